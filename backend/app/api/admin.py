@@ -1,48 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Header
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, case, func
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import base64
 import math
-import io
-import openpyxl
-from openpyxl.styles import Font, Alignment
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
+import shutil
 
+from ..config import settings
 from ..database import get_db
 from ..models.driver import Driver
 from ..models.bus_route import BusRoute
 from ..models.audit_log import AuditLog
 from ..schemas.admin import (
-    DriverCreate, DriverUpdate, DriverResponse, DriverListResponse,
-    RouteCreate, RouteUpdate, RouteResponse, RouteImportResponse,
-    StatisticsResponse, AuditLogResponse, AuditLogListResponse
+    DriverCreate, DriverUpdate, DriverResponse, DriverListResponse, DriverOption,
+    RouteCreate, RouteUpdate, RouteResponse, RouteImportResponse, RouteReorder,
+    StatisticsResponse, AuditLogResponse, AuditLogListResponse, JobResponse
 )
-from ..services.auth_service import get_current_admin, hash_password
+from ..services.audit_service import audit_log_query, create_audit_log, iter_audit_log_csv
+from ..services.auth_service import get_current_admin, hash_password, invalidate_cached_driver
 from ..services.cache_service import CacheService
+from ..services.export_service import (
+    EXPORT_FORMATS, cached_routes_export, export_filename, invalidate_export_cache,
+    iter_routes_csv, routes_version
+)
+from ..services.fleet_service import fleet_snapshot
+from ..services.import_service import import_route_file
+from ..services.profiler_service import StackSampler
+from ..services.job_service import (
+    job_service, new_job_id, read_job, job_file_path, JOB_COMPLETED
+)
+from ..services.route_directory import route_directory
+from ..services.route_order_service import next_sl_no, reorder_routes
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
 
+STATS_CACHE_KEY = "admin:statistics"
+
+
+def _dashboard_counts(db: Session) -> dict:
+    """
+    Driver and route counts from one SELECT of conditional counts, cached
+    for STATS_CACHE_TTL seconds and shared by every tab and worker.
+    """
+    counts = CacheService.get_json(STATS_CACHE_KEY)
+    if counts is not None:
+        return counts
+    
+    # Scalar subqueries, so the two tables aren't joined into a cartesian product
+    row = db.query(
+        db.query(func.count(Driver.driver_id)).scalar_subquery(),
+        db.query(func.count(case((Driver.is_active == True, 1)))).scalar_subquery(),
+        db.query(func.count(BusRoute.route_id)).scalar_subquery(),
+        db.query(func.count(case((BusRoute.is_active == True, 1)))).scalar_subquery()
+    ).one()
+    
+    counts = {
+        "total_drivers": row[0],
+        "active_drivers": row[1],
+        "total_routes": row[2],
+        "active_routes": row[3]
+    }
+    CacheService.set_json(STATS_CACHE_KEY, counts, settings.STATS_CACHE_TTL)
+    return counts
+
+
 @router.get("/system/status")
-def get_system_status(db: Session = Depends(get_db)):
+async def get_system_status(db: Session = Depends(get_db)):
     """Get system status including Redis and active buses."""
     from ..services.cache_service import get_redis_client
     
     # Check Redis
-    redis_client = get_redis_client()
+    redis_client = await run_in_threadpool(get_redis_client)
     redis_status = "connected" if redis_client else "disconnected"
     
-    # Get active buses
-    active_buses = CacheService.get_all_active_buses()
+    # Active buses come from the shared fleet snapshot
+    await fleet_snapshot.ensure_fresh()
+    active_buses = fleet_snapshot.buses
     
-    # Get total routes
-    total_routes = db.query(BusRoute).filter(BusRoute.is_active == True).count()
+    counts = await run_in_threadpool(_dashboard_counts, db)
     
     return {
         "redis_status": redis_status,
@@ -55,72 +95,187 @@ def get_system_status(db: Session = Depends(get_db)):
             }
             for bus in active_buses
         ],
-        "total_routes": total_routes,
+        "total_routes": counts["active_routes"],
         "timestamp": datetime.utcnow().isoformat()
     }
 
 
-# Helper function for audit logging
-def create_audit_log(
-    db: Session,
-    admin_id: int,
-    action_type: str,
-    entity_type: str,
-    entity_id: int,
-    changes: dict = None
+@router.get("/system/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = 10,
+    interval: Optional[float] = None,
+    idle: bool = False,
+    current_admin: Driver = Depends(get_current_admin())
 ):
-    """Create an audit log entry"""
-    audit_log = AuditLog(
-        admin_id=admin_id,
-        action_type=action_type,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        changes=changes
-    )
-    db.add(audit_log)
-    db.commit()
+    """
+    Sample every thread of the worker that serves this request for `seconds`
+    and return collapsed stacks (flamegraph.pl / speedscope input). Threads
+    waiting for work are left out unless `idle` is set. With several workers,
+    each call profiles one of them.
+    """
+    if not 0 < seconds <= settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be between 0 and {settings.PROFILER_MAX_SECONDS}"
+        )
+    interval = interval or settings.PROFILER_INTERVAL
+    if not 0.001 <= interval <= 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="interval must be between 0.001 and 1 second"
+        )
+    
+    sampler = StackSampler(interval, include_idle=idle)
+    if not sampler.start():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker"
+        )
+    try:
+        # Sleeping keeps the event loop serving traffic while it is sampled
+        await asyncio.sleep(seconds)
+    finally:
+        collapsed = sampler.stop()
+    
+    return PlainTextResponse(collapsed, headers={"X-Profile-Samples": str(sampler.samples)})
+
+
+def _routes_changed():
+    """Drop caches derived from bus_routes after an admin change."""
+    route_directory.invalidate()
+    invalidate_export_cache()
+    CacheService.delete(STATS_CACHE_KEY)
 
 
 # ==================== DRIVER MANAGEMENT ====================
 
+DRIVER_COUNT_CACHE_KEY = "admin:drivers:count:"
+DRIVER_OPTIONS_CACHE_KEY = "admin:drivers:options"
+
+
+def _encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _keyset_before(db: Session, created_at_column, id_column, cursor: str):
+    """
+    Filter for rows after `cursor` in (created_at desc, id desc) order.
+    Cursors come from _encode_cursor on the last row of the previous page.
+    """
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at, row_id = datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    column, value = created_at_column, created_at
+    if db.bind.dialect.name == "sqlite":
+        # server_default timestamps are stored without microseconds but
+        # bound with them; compare as numbers so equal times match
+        column, value = func.julianday(column), func.julianday(value)
+    return or_(
+        column < value,
+        and_(column == value, id_column < row_id)
+    )
+
+
+def _driver_search_filter(search: str):
+    """
+    Case-insensitive prefix match on name, phone or email. Prefix patterns
+    can use the lower(name) / lower(email) and phone indexes; '%term%' can't.
+    """
+    term = search.strip().lower()
+    for char in ("\\", "%", "_"):
+        term = term.replace(char, "\\" + char)
+    pattern = f"{term}%"
+    return or_(
+        func.lower(Driver.name).like(pattern, escape="\\"),
+        Driver.phone.like(pattern, escape="\\"),
+        Driver.phone.like(f"+91{pattern}", escape="\\"),
+        func.lower(Driver.email).like(pattern, escape="\\")
+    )
+
+
+def _drivers_changed():
+    """Drop cached driver counts and dropdown options after an admin change."""
+    CacheService.delete(DRIVER_COUNT_CACHE_KEY, DRIVER_OPTIONS_CACHE_KEY, STATS_CACHE_KEY)
+
+
 @router.get("/drivers", response_model=DriverListResponse)
 def list_drivers(
     page: int = 1,
     per_page: int = 10,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_admin: Driver = Depends(get_current_admin())
 ):
-    """List all drivers with pagination and search"""
+    """
+    List drivers, newest first, with prefix search.
+    Pass `cursor` (the previous response's `next_cursor`) to page by keyset
+    on (created_at, driver_id); `page` falls back to OFFSET paging.
+    `total` is cached for ADMIN_LIST_CACHE_TTL seconds, so it may lag slightly.
+    """
     query = db.query(Driver)
     
     # Apply search filter
-    if search:
-        search_filter = or_(
-            Driver.name.ilike(f"%{search}%"),
-            Driver.phone.ilike(f"%{search}%"),
-            Driver.email.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+    if search and search.strip():
+        query = query.filter(_driver_search_filter(search))
     
-    # Get total count
-    total = query.count()
+    # Total count, cached per search term
+    count_key = DRIVER_COUNT_CACHE_KEY + (search or "").strip().lower()
+    total = CacheService.get_json(count_key)
+    if total is None:
+        total = query.count()
+        CacheService.set_json(count_key, total, settings.ADMIN_LIST_CACHE_TTL)
     
-    # Calculate pagination
     pages = math.ceil(total / per_page)
-    offset = (page - 1) * per_page
+    query = query.order_by(Driver.created_at.desc(), Driver.driver_id.desc())
+    
+    if cursor:
+        query = query.filter(_keyset_before(db, Driver.created_at, Driver.driver_id, cursor))
+    else:
+        query = query.offset((page - 1) * per_page)
     
-    # Get paginated results
-    drivers = query.order_by(Driver.created_at.desc()).offset(offset).limit(per_page).all()
+    # One extra row tells us whether there is a next page
+    drivers = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(drivers) > per_page:
+        drivers = drivers[:per_page]
+        next_cursor = _encode_cursor(drivers[-1].created_at, drivers[-1].driver_id)
     
     return DriverListResponse(
         drivers=drivers,
         total=total,
         page=page,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor
     )
 
 
+@router.get("/drivers/options", response_model=List[DriverOption])
+def list_driver_options(
+    db: Session = Depends(get_db),
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Id, name and phone of every driver, for dropdowns."""
+    options = CacheService.get_json(DRIVER_OPTIONS_CACHE_KEY)
+    if options is None:
+        rows = db.query(
+            Driver.driver_id, Driver.name, Driver.phone, Driver.is_active
+        ).order_by(Driver.name).all()
+        options = [
+            {"driver_id": driver_id, "name": name, "phone": phone, "is_active": bool(is_active)}
+            for driver_id, name, phone, is_active in rows
+        ]
+        CacheService.set_json(DRIVER_OPTIONS_CACHE_KEY, options, settings.ADMIN_LIST_CACHE_TTL)
+    return options
+
+
 @router.post("/drivers", response_model=DriverResponse)
 def create_driver(
     driver_data: DriverCreate,
@@ -156,15 +311,18 @@ def create_driver(
     )
     
     db.add(new_driver)
-    db.commit()
-    db.refresh(new_driver)
+    db.flush()  # assigns driver_id for the audit entry
     
-    # Create audit log
+    # Audit entry is committed with the driver
     create_audit_log(
         db, current_admin.driver_id, "CREATE", "driver", new_driver.driver_id,
         {"name": new_driver.name, "phone": new_driver.phone}
     )
     
+    db.commit()
+    db.refresh(new_driver)
+    _drivers_changed()
+    
     return new_driver
 
 
@@ -240,10 +398,7 @@ def update_driver(
     if driver_data.is_admin is not None:
         driver.is_admin = driver_data.is_admin
     
-    db.commit()
-    db.refresh(driver)
-    
-    # Create audit log
+    # Audit entry is committed with the change
     new_values = {
         "name": driver.name,
         "phone": driver.phone,
@@ -256,6 +411,11 @@ def update_driver(
         {"before": old_values, "after": new_values}
     )
     
+    db.commit()
+    db.refresh(driver)
+    invalidate_cached_driver(driver_id)
+    _drivers_changed()
+    
     return driver
 
 
@@ -283,15 +443,15 @@ def delete_driver(
     # Store info for audit
     driver_info = {"name": driver.name, "phone": driver.phone}
     
-    # Delete driver
+    # Delete driver; the audit entry is committed with the delete
     db.delete(driver)
-    db.commit()
-    
-    # Create audit log
     create_audit_log(
         db, current_admin.driver_id, "DELETE", "driver", driver_id,
         driver_info
     )
+    db.commit()
+    invalidate_cached_driver(driver_id)
+    _drivers_changed()
     
     return {"success": True, "message": "Driver deleted successfully"}
 
@@ -304,7 +464,7 @@ def list_routes(
     current_admin: Driver = Depends(get_current_admin())
 ):
     """List all bus routes ordered by sl_no"""
-    routes = db.query(BusRoute).order_by(BusRoute.sl_no).all()
+    routes = db.query(BusRoute).order_by(BusRoute.sl_no, BusRoute.route_id).all()
     return routes
 
 
@@ -323,9 +483,8 @@ def create_route(
             detail="Vehicle number already exists"
         )
     
-    # Auto-assign next sl_no
-    max_sl_no = db.query(BusRoute).count()
-    next_sl_no = max_sl_no + 1
+    # Append after the current last route
+    sl_no = next_sl_no(db)
     
     # Try to find driver by phone number to auto-link
     driver_id = route_data.driver_id
@@ -368,7 +527,7 @@ def create_route(
     
     # Create route
     new_route = BusRoute(
-        sl_no=next_sl_no,
+        sl_no=sl_no,
         bus_route=route_data.bus_route,
         route_no=route_data.route_no,
         vehicle_no=route_data.vehicle_no,
@@ -379,10 +538,9 @@ def create_route(
     )
     
     db.add(new_route)
-    db.commit()
-    db.refresh(new_route)
+    db.flush()  # assigns route_id for the audit entry
     
-    # Create audit log with driver link info
+    # Audit entry with driver link info, committed with the route
     create_audit_log(
         db, current_admin.driver_id, "CREATE", "route", new_route.route_id,
         {
@@ -393,6 +551,10 @@ def create_route(
         }
     )
     
+    db.commit()
+    db.refresh(new_route)
+    _routes_changed()
+    
     # Add debug message to response (will show in browser console/network tab)
     if driver_link_message:
         print(f"\n{'='*60}")
@@ -459,10 +621,7 @@ def update_route(
     if route_data.is_active is not None:
         route.is_active = route_data.is_active
     
-    db.commit()
-    db.refresh(route)
-    
-    # Create audit log
+    # Audit entry is committed with the change
     new_values = {
         "sl_no": route.sl_no,
         "bus_route": route.bus_route,
@@ -476,6 +635,10 @@ def update_route(
         {"before": old_values, "after": new_values}
     )
     
+    db.commit()
+    db.refresh(route)
+    _routes_changed()
+    
     return route
 
 
@@ -485,7 +648,7 @@ def delete_route(
     db: Session = Depends(get_db),
     current_admin: Driver = Depends(get_current_admin())
 ):
-    """Delete bus route and renumber remaining routes"""
+    """Delete bus route. Later routes keep their sl_no; the gap is harmless."""
     route = db.query(BusRoute).filter(BusRoute.route_id == route_id).first()
     if not route:
         raise HTTPException(
@@ -493,255 +656,202 @@ def delete_route(
             detail="Route not found"
         )
     
-    deleted_sl_no = route.sl_no
     route_info = {"route_no": route.route_no, "vehicle_no": route.vehicle_no}
     
     # Delete route
     db.delete(route)
     
-    # Renumber remaining routes
-    routes_to_renumber = db.query(BusRoute).filter(BusRoute.sl_no > deleted_sl_no).all()
-    for r in routes_to_renumber:
-        r.sl_no -= 1
-    
-    db.commit()
-    
-    # Create audit log
+    # Audit entry is committed with the delete
     create_audit_log(
         db, current_admin.driver_id, "DELETE", "route", route_id,
         route_info
     )
     
+    db.commit()
+    _routes_changed()
+    
     return {"success": True, "message": "Route deleted successfully"}
 
 
+@router.post("/routes/reorder")
+def reorder_bus_routes(
+    reorder: RouteReorder,
+    db: Session = Depends(get_db),
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """
+    Move the given routes to the top, in order; the rest follow in their
+    current order. Renumbers sl_no 1..n, which also closes gaps left by
+    deletes (send an empty list to only do that).
+    """
+    try:
+        updated = reorder_routes(db, reorder.route_ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if updated:
+        # Audit entry is committed with the new order
+        create_audit_log(
+            db, current_admin.driver_id, "UPDATE", "route", 0,
+            {"action": "reorder", "route_ids": reorder.route_ids, "renumbered": updated}
+        )
+        db.commit()
+        _routes_changed()
+    
+    return {"success": True, "updated": updated}
+
+
 @router.post("/routes/import", response_model=RouteImportResponse)
-async def import_routes(
+def import_routes(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_admin: Driver = Depends(get_current_admin())
 ):
-    """Bulk import routes from Excel/CSV"""
+    """Bulk import routes from Excel/CSV (streamed, one uniqueness query, chunked inserts)"""
     if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only Excel (.xlsx, .xls) and CSV files are supported"
         )
     
-    imported = 0
-    failed = 0
-    errors = []
-    
     try:
-        contents = await file.read()
-        
-        if file.filename.endswith('.csv'):
-            # Parse CSV
-            import csv
-            lines = contents.decode('utf-8').splitlines()
-            reader = csv.DictReader(lines)
-            rows = list(reader)
-        else:
-            # Parse Excel
-            wb = openpyxl.load_workbook(io.BytesIO(contents))
-            ws = wb.active
-            headers = [cell.value for cell in ws[1]]
-            rows = []
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                rows.append(dict(zip(headers, row)))
-        
-        # Get current max sl_no
-        max_sl_no = db.query(BusRoute).count()
-        next_sl_no = max_sl_no + 1
-        
-        for idx, row in enumerate(rows, start=2):
-            try:
-                # Validate required fields
-                required_fields = ['Bus Route', 'Route No', 'Vehicle No', 'Driver Name', 'Phone Number']
-                missing = [f for f in required_fields if not row.get(f)]
-                if missing:
-                    errors.append({
-                        "row": idx,
-                        "error": f"Missing fields: {', '.join(missing)}"
-                    })
-                    failed += 1
-                    continue
-                
-                # Check vehicle_no uniqueness
-                vehicle_no = str(row['Vehicle No']).strip()
-                existing = db.query(BusRoute).filter(BusRoute.vehicle_no == vehicle_no).first()
-                if existing:
-                    errors.append({
-                        "row": idx,
-                        "error": f"Vehicle number {vehicle_no} already exists"
-                    })
-                    failed += 1
-                    continue
-                
-                # Create route
-                new_route = BusRoute(
-                    sl_no=next_sl_no,
-                    bus_route=str(row['Bus Route']).strip(),
-                    route_no=str(row['Route No']).strip(),
-                    vehicle_no=vehicle_no,
-                    driver_name=str(row['Driver Name']).strip(),
-                    phone_number=str(row['Phone Number']).strip(),
-                    is_active=True
-                )
-                
-                db.add(new_route)
-                next_sl_no += 1
-                imported += 1
-                
-            except Exception as e:
-                errors.append({
-                    "row": idx,
-                    "error": str(e)
-                })
-                failed += 1
+        # Routes and their audit entries are committed together
+        result = import_route_file(
+            db, file.file, file.filename, admin_id=current_admin.driver_id
+        )
         
         db.commit()
-        
-        # Create audit log
-        create_audit_log(
-            db, current_admin.driver_id, "CREATE", "route", 0,
-            {"action": "bulk_import", "imported": imported, "failed": failed}
-        )
+        _routes_changed()
         
     except Exception as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing file: {str(e)}"
         )
     
-    return RouteImportResponse(
-        imported=imported,
-        failed=failed,
-        errors=errors
-    )
+    return RouteImportResponse(**result)
 
 
 @router.get("/routes/export")
-async def export_routes(
+def export_routes(
     format: str = "excel",
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_admin: Driver = Depends(get_current_admin())
 ):
-    """Export routes as Excel or PDF"""
-    routes = db.query(BusRoute).order_by(BusRoute.sl_no).all()
-    
-    if format == "excel":
-        # Create Excel file
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Bus Routes"
-        
-        # Headers
-        headers = ['Sl.No', 'Bus Route', 'Route No', 'Vehicle No', 'Driver Name', 'Phone Number']
-        ws.append(headers)
-        
-        # Style headers
-        for cell in ws[1]:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Data
-        for route in routes:
-            ws.append([
-                route.sl_no,
-                route.bus_route,
-                route.route_no,
-                route.vehicle_no,
-                route.driver_name,
-                route.phone_number
-            ])
-        
-        # Auto-size columns
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to bytes
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        filename = f"bus_routes_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
-        
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+    """
+    Export routes as Excel, CSV or PDF.
+    Excel and PDF files are cached on disk per route-table version; the
+    ETag lets browsers revalidate without downloading again.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid format. Use 'excel', 'csv' or 'pdf'"
         )
     
-    elif format == "pdf":
-        # Create PDF
-        output = io.BytesIO()
-        doc = SimpleDocTemplate(output, pagesize=landscape(A4))
-        elements = []
-        
-        # Title
-        styles = getSampleStyleSheet()
-        title = Paragraph("Sathyabama University Bus Routes", styles['Title'])
-        elements.append(title)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Date
-        date_text = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal'])
-        elements.append(date_text)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Table data
-        data = [['Sl.No', 'Bus Route', 'Route No', 'Vehicle No', 'Driver Name', 'Phone Number']]
-        for route in routes:
-            data.append([
-                str(route.sl_no),
-                route.bus_route[:50] + '...' if len(route.bus_route) > 50 else route.bus_route,
-                route.route_no,
-                route.vehicle_no,
-                route.driver_name,
-                route.phone_number
-            ])
-        
-        # Create table
-        table = Table(data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ]))
-        
-        elements.append(table)
-        doc.build(elements)
-        
-        output.seek(0)
-        filename = f"bus_routes_{datetime.now().strftime('%Y-%m-%d')}.pdf"
-        
-        return StreamingResponse(
-            output,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+    version = routes_version(db)
+    etag = f'"{version}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if if_none_match and etag in [tag.strip().lstrip("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    _, media_type = EXPORT_FORMATS[format]
+    headers["Content-Disposition"] = f"attachment; filename={export_filename(format)}"
+    
+    if format == "csv":
+        # Cheap to build: rows go straight from the cursor to the client
+        return StreamingResponse(iter_routes_csv(), media_type=media_type, headers=headers)
+    
+    return FileResponse(
+        cached_routes_export(db, format, version),
+        media_type=media_type,
+        headers=headers
+    )
+
+
+# ==================== BACKGROUND JOBS ====================
+
+@router.post("/jobs/routes/import", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_route_import(
+    file: UploadFile = File(...),
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Queue a bulk route import; poll /jobs/{job_id} for progress and the result"""
+    if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only Excel (.xlsx, .xls) and CSV files are supported"
         )
     
-    else:
+    job_id = new_job_id()
+    upload_path = job_file_path(job_id, "upload")
+    with open(upload_path, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+    
+    return job_service.submit(
+        "route_import", job_id=job_id,
+        upload_path=upload_path, filename=file.filename, admin_id=current_admin.driver_id
+    )
+
+
+@router.post("/jobs/routes/export", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_route_export(
+    format: str = "excel",
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Queue a route export; download it from /jobs/{job_id}/result when completed"""
+    if format not in EXPORT_FORMATS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid format. Use 'excel' or 'pdf'"
+            detail="Invalid format. Use 'excel', 'csv' or 'pdf'"
         )
+    return job_service.submit("route_export", format=format)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: str,
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Get background job status, progress and (for imports) the result"""
+    job = read_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or expired"
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(
+    job_id: str,
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Download the file produced by a completed export job"""
+    job = read_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or expired"
+        )
+    if job["status"] != JOB_COMPLETED or "filename" not in (job.get("result") or {}):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job has no downloadable result (status: {job['status']})"
+        )
+    
+    return FileResponse(
+        job_file_path(job_id, "result"),
+        media_type=job["result"]["media_type"],
+        filename=job["result"]["filename"]
+    )
 
 
 # ==================== STATISTICS ====================
@@ -752,25 +862,22 @@ def get_statistics(
     current_admin: Driver = Depends(get_current_admin())
 ):
     """Get dashboard statistics"""
-    total_drivers = db.query(Driver).count()
-    active_drivers = db.query(Driver).filter(Driver.is_active == True).count()
-    total_routes = db.query(BusRoute).count()
-    
-    # Get active buses from Redis
-    active_buses_list = CacheService.get_all_active_buses()
-    active_buses = len(active_buses_list)
+    counts = _dashboard_counts(db)
     
     return StatisticsResponse(
-        total_drivers=total_drivers,
-        active_drivers=active_drivers,
-        total_routes=total_routes,
-        active_buses=active_buses,
+        total_drivers=counts["total_drivers"],
+        active_drivers=counts["active_drivers"],
+        total_routes=counts["total_routes"],
+        active_buses=CacheService.count_active_buses(),
         last_updated=datetime.utcnow()
     )
 
 
 # ==================== AUDIT LOG ====================
 
+AUDIT_COUNT_CACHE_KEY = "admin:audit:count:"
+
+
 @router.get("/audit-log", response_model=AuditLogListResponse)
 def get_audit_log(
     start_date: Optional[datetime] = None,
@@ -778,48 +885,75 @@ def get_audit_log(
     action_type: Optional[str] = None,
     page: int = 1,
     per_page: int = 50,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_admin: Driver = Depends(get_current_admin())
 ):
-    """Get audit log entries with filters"""
-    query = db.query(AuditLog).join(Driver, AuditLog.admin_id == Driver.driver_id)
-    
-    # Apply filters
-    if start_date:
-        query = query.filter(AuditLog.created_at >= start_date)
-    if end_date:
-        query = query.filter(AuditLog.created_at <= end_date)
-    if action_type and action_type != "ALL":
-        query = query.filter(AuditLog.action_type == action_type)
-    
-    # Get total count
-    total = query.count()
+    """
+    Get audit log entries with filters, newest first.
+    Pass `cursor` (the previous response's `next_cursor`) to page by keyset
+    on (created_at, log_id); `page` falls back to OFFSET paging.
+    `total` is cached for ADMIN_LIST_CACHE_TTL seconds, so it may lag slightly.
+    """
+    query = audit_log_query(db, start_date, end_date, action_type)
+    
+    # Total count, cached per filter combination
+    count_key = AUDIT_COUNT_CACHE_KEY + f"{start_date}|{end_date}|{action_type}"
+    total = CacheService.get_json(count_key)
+    if total is None:
+        total = query.count()
+        CacheService.set_json(count_key, total, settings.ADMIN_LIST_CACHE_TTL)
     
-    # Calculate pagination
     pages = math.ceil(total / per_page)
-    offset = (page - 1) * per_page
+    query = query.order_by(AuditLog.created_at.desc(), AuditLog.log_id.desc())
     
-    # Get paginated results
-    logs = query.order_by(AuditLog.created_at.desc()).offset(offset).limit(per_page).all()
-    
-    # Format response
-    log_responses = []
-    for log in logs:
-        admin = db.query(Driver).filter(Driver.driver_id == log.admin_id).first()
-        log_responses.append(AuditLogResponse(
+    if cursor:
+        query = query.filter(_keyset_before(db, AuditLog.created_at, AuditLog.log_id, cursor))
+    else:
+        query = query.offset((page - 1) * per_page)
+    
+    # Admin names come from the join; one extra row tells us whether there is a next page
+    rows = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last_log = rows[-1][0]
+        next_cursor = _encode_cursor(last_log.created_at, last_log.log_id)
+    
+    log_responses = [
+        AuditLogResponse(
             log_id=log.log_id,
             admin_id=log.admin_id,
-            admin_name=admin.name if admin else "Unknown",
+            admin_name=admin_name or "Unknown",
             action_type=log.action_type,
             entity_type=log.entity_type,
             entity_id=log.entity_id,
             changes=log.changes,
             created_at=log.created_at
-        ))
+        )
+        for log, admin_name in rows
+    ]
     
     return AuditLogListResponse(
         logs=log_responses,
         total=total,
         page=page,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/audit-log/export")
+def export_audit_log(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    action_type: Optional[str] = None,
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Download the (filtered) audit log as CSV, streamed row by row"""
+    filename = f"audit_log_{datetime.now().strftime('%Y-%m-%d')}.csv"
+    return StreamingResponse(
+        iter_audit_log_csv(start_date, end_date, action_type),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
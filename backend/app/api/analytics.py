@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import date
+
+from ..database import get_db
+from ..models.driver import Driver
+from ..schemas.analytics import (
+    BusDailyStatsResponse, RouteDailyStatsResponse, FleetSummaryResponse, RollupResponse
+)
+from ..services.analytics_service import (
+    analytics_rollup, bus_daily_report, default_range, fleet_summary, route_daily_report
+)
+from ..services.auth_service import get_current_admin
+from ..services.location_history import location_recorder
+
+router = APIRouter(prefix="/api/admin/analytics", tags=["Analytics"])
+
+
+@router.get("/summary", response_model=FleetSummaryResponse)
+def get_fleet_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Fleet totals for a date range (default: last 7 days)"""
+    start_date, end_date = default_range(start_date, end_date)
+    return fleet_summary(db, start_date, end_date)
+
+
+@router.get("/buses", response_model=List[BusDailyStatsResponse])
+def get_bus_daily_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    bus_number: Optional[str] = None,
+    route_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Per-bus daily distance, moving/idle time, first/last fix and speeds"""
+    start_date, end_date = default_range(start_date, end_date)
+    return bus_daily_report(db, start_date, end_date, bus_number, route_id)
+
+
+@router.get("/routes", response_model=List[RouteDailyStatsResponse])
+def get_route_daily_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Per-route daily totals across the buses that ran each route"""
+    start_date, end_date = default_range(start_date, end_date)
+    return route_daily_report(db, start_date, end_date)
+
+
+@router.post("/rollup", response_model=RollupResponse)
+async def run_analytics_rollup(
+    current_admin: Driver = Depends(get_current_admin())
+):
+    """Flush buffered fixes and roll them up now instead of waiting for the next run"""
+    await run_in_threadpool(location_recorder.flush)
+    return await run_in_threadpool(analytics_rollup.run)
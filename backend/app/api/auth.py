@@ -1,10 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List
-from ..database import get_db
+from ..config import settings
+from ..database import get_db, get_async_db
 from ..models.driver import Driver
 from ..schemas.driver import DriverLogin, DriverCreate, DriverResponse, TokenResponse
-from ..services.auth_service import hash_password, verify_password, create_access_token
+from ..services.auth_service import (
+    hash_password, hash_password_async, verify_password_async, needs_rehash, create_access_token,
+    login_attempts_exceeded, record_login_failure, clear_login_failures
+)
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 
@@ -47,28 +54,35 @@ def register_driver(driver_data: DriverCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login_driver(credentials: DriverLogin, db: Session = Depends(get_db)):
+async def login_driver(credentials: DriverLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Driver login with permanent session.
     Returns JWT token that expires in 10 years.
+    Password checks run in the hashing pool; after LOGIN_MAX_ATTEMPTS failures
+    a phone number is locked out for LOGIN_ATTEMPT_WINDOW seconds.
     """
     
-    # Find driver by phone
-    driver = db.query(Driver).filter(Driver.phone == credentials.phone).first()
-    
-    if not driver:
+    if await run_in_threadpool(login_attempts_exceeded, credentials.phone):
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid phone number or password"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts. Try again later.",
+            headers={"Retry-After": str(settings.LOGIN_ATTEMPT_WINDOW)}
         )
     
+    # Find driver by phone
+    result = await db.execute(select(Driver).where(Driver.phone == credentials.phone))
+    driver = result.scalars().first()
+    
     # Verify password
-    if not verify_password(credentials.password, driver.hashed_password):
+    if not driver or not await verify_password_async(credentials.password, driver.hashed_password):
+        await run_in_threadpool(record_login_failure, credentials.phone)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid phone number or password"
         )
     
+    await run_in_threadpool(clear_login_failures, credentials.phone)
+    
     # Check if driver is active
     if not driver.is_active:
         raise HTTPException(
@@ -76,6 +90,12 @@ def login_driver(credentials: DriverLogin, db: Session = Depends(get_db)):
             detail="Account is inactive. Contact admin."
         )
     
+    # Upgrade the stored hash if BCRYPT_ROUNDS changed since it was made
+    if needs_rehash(driver.hashed_password):
+        driver.hashed_password = await hash_password_async(credentials.password)
+        await db.commit()
+        await db.refresh(driver)
+    
     # Create permanent access token (10 years)
     access_token = create_access_token(
         data={"sub": driver.phone, "driver_id": driver.driver_id, "is_admin": driver.is_admin}
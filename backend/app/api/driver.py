@@ -1,13 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 from pydantic import BaseModel
-from ..database import get_db
+import logging
+from ..database import get_async_db
+from ..logging_config import log_sampled
 from ..models.driver import Driver
 from ..models.bus_route import BusRoute
 from ..services.auth_service import get_current_driver
 from ..services.cache_service import CacheService
-from datetime import datetime
+from ..services.location_history import location_recorder
+from ..services.metrics_service import LOCATION_FIX_CLOCK_AHEAD, LOCATION_FIX_DELAY, LOCATION_UPDATES
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/driver", tags=["Driver"])
 
@@ -22,9 +30,11 @@ class LocationUpdateRequest(BaseModel):
     bus_number: str
     latitude: float
     longitude: float
-    speed: float
+    speed: float  # m/s, as the device's GPS reports it; stored as km/h
     heading: float = 0.0
     accuracy: float = 10.0
+    # When the device took the GPS fix (ISO 8601, or Unix seconds); naive times are UTC
+    fix_time: Optional[datetime] = None
 
 
 class DriverProfileResponse(BaseModel):
@@ -42,18 +52,20 @@ class DriverProfileResponse(BaseModel):
 
 
 @router.get("/profile", response_model=DriverProfileResponse)
-def get_driver_profile(
+async def get_driver_profile(
     current_driver: Driver = Depends(get_current_driver()),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current driver's profile with assigned bus and route."""
     
     # Get driver's assigned bus route from database
-    from ..models.bus_route import BusRoute
-    bus_route = db.query(BusRoute).filter(
-        BusRoute.driver_id == current_driver.driver_id,
-        BusRoute.is_active == True
-    ).first()
+    result = await db.execute(
+        select(BusRoute).where(
+            BusRoute.driver_id == current_driver.driver_id,
+            BusRoute.is_active == True
+        ).limit(1)
+    )
+    bus_route = result.scalars().first()
     
     return DriverProfileResponse(
         driver_id=current_driver.driver_id,
@@ -68,26 +80,27 @@ def get_driver_profile(
 
 
 @router.post("/start-shift")
-def start_shift(
+async def start_shift(
     request: StartShiftRequest,
     current_driver: Driver = Depends(get_current_driver()),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Driver starts their shift."""
     
     # Verify bus exists in routes
-    bus_route = db.query(BusRoute).filter(
-        BusRoute.vehicle_no == request.bus_number
-    ).first()
+    bus_route_id = await db.scalar(
+        select(BusRoute.route_id).where(BusRoute.vehicle_no == request.bus_number)
+    )
     
-    if not bus_route:
+    if bus_route_id is None:
         raise HTTPException(
             status_code=404,
             detail=f"Bus {request.bus_number} not found in routes"
         )
     
-    # Mark bus as active in cache
-    CacheService.set_bus_location(
+    # Mark bus as active in cache (sync Redis client, so off the event loop)
+    await run_in_threadpool(
+        CacheService.set_bus_location,
         request.bus_number,
         {
             "bus_number": request.bus_number,
@@ -125,40 +138,67 @@ def end_shift(
 @router.post("/location/update")
 def update_location(
     request: LocationUpdateRequest,
-    current_driver: Driver = Depends(get_current_driver()),
-    db: Session = Depends(get_db)
+    current_driver: Driver = Depends(get_current_driver())
 ):
     """
     Update bus location (called every 5-10 seconds by driver app).
-    Stores in Redis for real-time updates.
+    Stores in Redis for real-time updates. No database session is opened:
+    the driver comes from the auth cache.
     """
     
+    # Everything downstream (cache, history, analytics, apps) uses km/h
+    speed_kmh = request.speed * 3.6
+    
     # Determine status based on speed
-    if request.speed > 5:
+    if speed_kmh > 5:
         status = "moving"
-    elif request.speed < 1:
+    elif speed_kmh < 1:
         status = "idle"
     else:
         status = "stopped"
     
+    # Carried through the cache to WebSocket frames, so clients can show staleness
+    ingest_time = datetime.utcnow()
+    fix_time = None
+    if request.fix_time is not None:
+        fix_time = request.fix_time
+        if fix_time.tzinfo is not None:
+            fix_time = fix_time.astimezone(timezone.utc).replace(tzinfo=None)
+        fix_delay = (ingest_time - fix_time).total_seconds()
+        if fix_delay >= 0:
+            LOCATION_FIX_DELAY.observe(fix_delay)
+        else:
+            LOCATION_FIX_CLOCK_AHEAD.inc()
+    
     # Prepare location data
     location_data = {
         "bus_number": request.bus_number,
         "latitude": request.latitude,
         "longitude": request.longitude,
-        "speed": request.speed,
+        "speed": speed_kmh,
         "heading": request.heading,
         "accuracy": request.accuracy,
         "driver_name": current_driver.name,
-        "last_update": datetime.utcnow().isoformat(),
+        "last_update": ingest_time.isoformat(),
+        "fix_time": fix_time.isoformat() if fix_time else None,
+        "ingest_time": ingest_time.isoformat(),
         "status": status
     }
     
     # Store in Redis (60-second TTL)
     cache_success = CacheService.set_bus_location(request.bus_number, location_data, ttl=60)
     
-    print(f"🚌 Location update for bus {request.bus_number}: {location_data}")
-    print(f"📦 Cache success: {cache_success}")
+    # Queue the fix for location history (written in batches)
+    location_recorder.record(
+        request.bus_number, request.latitude, request.longitude,
+        speed_kmh, request.heading, request.accuracy
+    )
+    
+    LOCATION_UPDATES.inc(cached=str(cache_success).lower())
+    log_sampled(
+        logger, "Location update", bus_number=request.bus_number,
+        speed=speed_kmh, status=status, cache_success=cache_success
+    )
     
     return {
         "status": "location_updated",
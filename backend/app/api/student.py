@@ -1,25 +1,58 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from ..database import get_db
+from ..config import settings
+from ..database import get_async_db
 from ..models.bus_route import BusRoute
 from ..services.cache_service import CacheService
+from ..services.fleet_service import fleet_snapshot
+from ..services.route_directory import route_directory
 from datetime import datetime
+import json
 
 router = APIRouter(prefix="/api/v1/student", tags=["Student"])
 
 
+def _to_student_bus(bus_data: dict, route_name: str) -> dict:
+    """Convert a cached bus location into the student API format."""
+    return {
+        "busNumber": bus_data['bus_number'],
+        "route": route_name,
+        "latitude": bus_data['latitude'],
+        "longitude": bus_data['longitude'],
+        "speed": bus_data.get('speed', 0),
+        "heading": bus_data.get('heading', 0),
+        "lastUpdate": bus_data.get('last_update', datetime.utcnow().isoformat()),
+        "fixTime": bus_data.get('fix_time'),
+        "status": bus_data.get('status', 'active'),
+        "driverName": bus_data.get('driver_name', 'Unknown'),
+        "isSharingLocation": True
+    }
+
+
+def _split_param(value: Optional[str]) -> Optional[set]:
+    """Parse a comma-separated query parameter into a set."""
+    if not value:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()} or None
+
+
 @router.get("/routes/all")
-def get_all_routes(db: Session = Depends(get_db)):
+async def get_all_routes(db: AsyncSession = Depends(get_async_db)):
     """
     Get all bus routes from database (for route list view).
     Shows all routes regardless of active status.
     """
-    routes = db.query(BusRoute).filter(BusRoute.is_active == True).order_by(BusRoute.sl_no).all()
+    result = await db.execute(
+        select(BusRoute).where(BusRoute.is_active == True).order_by(BusRoute.sl_no)
+    )
+    routes = result.scalars().all()
     
-    # Get active buses from Redis to check status
-    active_buses_data = CacheService.get_all_active_buses()
-    active_bus_numbers = {bus['bus_number'] for bus in active_buses_data if 'bus_number' in bus}
+    # Check sharing status against the shared fleet snapshot
+    await fleet_snapshot.ensure_fresh()
+    active_bus_numbers = {bus['bus_number'] for bus in fleet_snapshot.buses}
     
     route_list = []
     for route in routes:
@@ -43,17 +76,35 @@ def get_all_routes(db: Session = Depends(get_db)):
 
 
 @router.get("/buses/active")
-def get_active_buses(
+async def get_active_buses(
     bounds: str = Query(None, description="Map bounds: lat1,lng1,lat2,lng2"),
-    db: Session = Depends(get_db)
+    since: Optional[int] = Query(None, description="Long-poll: wait until the fleet version differs from this"),
+    timeout: float = Query(
+        settings.LONG_POLL_TIMEOUT, gt=0,
+        description="Long-poll wait in seconds, capped at LONG_POLL_TIMEOUT"
+    )
 ):
     """
-    Get all active buses (from Redis cache).
+    Get all active buses (from the shared fleet snapshot).
     Optionally filter by map viewport bounds.
+    With `since`, the request is parked until the snapshot version moves
+    past it or `timeout` elapses; pass back the returned `version`.
     """
+    await fleet_snapshot.ensure_fresh()
+    if since is not None:
+        await fleet_snapshot.wait_for_change(since, min(timeout, settings.LONG_POLL_TIMEOUT))
     
-    # Get all active buses from Redis
-    active_buses_data = CacheService.get_all_active_buses()
+    # Read the snapshot once; a refresh may swap it while we filter
+    version = fleet_snapshot.version
+    active_buses_data = fleet_snapshot.buses
+    
+    viewport = None
+    if bounds:
+        try:
+            viewport = tuple(map(float, bounds.split(',')))
+            lat1, lng1, lat2, lng2 = viewport
+        except ValueError:
+            viewport = None  # Ignore invalid bounds
     
     # Convert to response format
     buses = []
@@ -63,46 +114,93 @@ def get_active_buses(
             continue
             
         # Filter by bounds if provided
-        if bounds:
-            try:
-                lat1, lng1, lat2, lng2 = map(float, bounds.split(','))
-                if not (lat1 <= bus_data['latitude'] <= lat2 and lng1 <= bus_data['longitude'] <= lng2):
-                    continue
-            except:
-                pass  # Ignore invalid bounds
-        
-        # Get route info from database
-        route_name = bus_data.get('route', 'Unknown Route')
-        bus_route = db.query(BusRoute).filter(
-            BusRoute.vehicle_no == bus_data['bus_number']
-        ).first()
-        
-        if bus_route:
-            route_name = bus_route.bus_route
+        if viewport and not (lat1 <= bus_data['latitude'] <= lat2 and lng1 <= bus_data['longitude'] <= lng2):
+            continue
         
-        buses.append({
-            "busNumber": bus_data['bus_number'],
-            "route": route_name,
-            "latitude": bus_data['latitude'],
-            "longitude": bus_data['longitude'],
-            "speed": bus_data.get('speed', 0),
-            "heading": bus_data.get('heading', 0),
-            "lastUpdate": bus_data.get('last_update', datetime.utcnow().isoformat()),
-            "status": bus_data.get('status', 'active'),
-            "driverName": bus_data.get('driver_name', 'Unknown'),
-            "isSharingLocation": True
-        })
+        buses.append(_to_student_bus(bus_data, bus_data['route_name']))
     
     return {
         "buses": buses,
         "timestamp": datetime.utcnow().isoformat(),
-        "count": len(buses)
+        "count": len(buses),
+        "version": version
     }
 
 
+@router.get("/stream")
+async def stream_bus_updates(
+    request: Request,
+    routes: str = Query(None, description="Comma-separated route numbers to follow"),
+    buses: str = Query(None, description="Comma-separated vehicle numbers to follow"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Server-Sent Events stream of active buses for read-only clients.
+    Each event id is the fleet snapshot version, tagged with the serving
+    process; browsers send it back as Last-Event-ID on reconnect. The
+    current state is re-sent if the fleet changed since then, or if the
+    id came from another worker or before a restart.
+    """
+    route_filter = _split_param(routes)
+    bus_filter = _split_param(buses)
+    last_version = fleet_snapshot.version_from_event_id(last_event_id)
+
+    def select_buses() -> List[dict]:
+        selected = []
+        for bus_data in fleet_snapshot.buses:
+            if 'latitude' not in bus_data or 'longitude' not in bus_data:
+                continue
+            if bus_filter and bus_data['bus_number'] not in bus_filter:
+                continue
+            if route_filter and bus_data.get('route_no') not in route_filter:
+                continue
+            bus = _to_student_bus(bus_data, bus_data['route_name'])
+            bus["routeNo"] = bus_data.get('route_no')
+            selected.append(bus)
+        return selected
+
+    async def event_stream():
+        version = last_version
+        sent_buses = None
+        yield f"retry: {settings.WS_RECONNECT_DELAY * 1000}\n\n"
+
+        while True:
+            await fleet_snapshot.ensure_fresh()
+
+            if fleet_snapshot.version != version:
+                version = fleet_snapshot.version
+                selected = select_buses()
+                # Filtered clients skip snapshots that don't touch their buses
+                if selected != sent_buses:
+                    sent_buses = selected
+                    payload = json.dumps({
+                        "buses": selected,
+                        "timestamp": fleet_snapshot.timestamp,
+                        "count": len(selected),
+                        "version": version
+                    })
+                    yield f"id: {fleet_snapshot.event_id(version)}\nevent: bus_update\ndata: {payload}\n\n"
+
+            if not await fleet_snapshot.wait_for_change(version, settings.SSE_KEEPALIVE_INTERVAL):
+                # Keep proxies from closing an idle stream
+                yield ": keepalive\n\n"
+
+            if await request.is_disconnected():
+                break
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/buses/{bus_number}")
-def get_bus_location(bus_number: str, db: Session = Depends(get_db)):
-    """Get specific bus location and details."""
+def get_bus_location(bus_number: str):
+    """Get specific bus location and details (cache and route directory only)."""
     
     # Try Redis first
     bus_data = CacheService.get_bus_location(bus_number)
@@ -115,12 +213,10 @@ def get_bus_location(bus_number: str, db: Session = Depends(get_db)):
     
     # Get route info
     route_name = bus_data.get('route', 'Unknown Route')
-    bus_route = db.query(BusRoute).filter(
-        BusRoute.vehicle_no == bus_number
-    ).first()
+    bus_route = route_directory.get(bus_number)
     
     if bus_route:
-        route_name = bus_route.bus_route
+        route_name = bus_route["bus_route"]
     
     return {
         "busNumber": bus_data['bus_number'],
@@ -130,6 +226,7 @@ def get_bus_location(bus_number: str, db: Session = Depends(get_db)):
         "speed": bus_data.get('speed', 0),
         "heading": bus_data.get('heading', 0),
         "lastUpdate": bus_data.get('last_update', datetime.utcnow().isoformat()),
+        "fixTime": bus_data.get('fix_time'),
         "status": bus_data.get('status', 'active'),
         "driverName": bus_data.get('driver_name', 'Unknown')
     }
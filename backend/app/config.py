@@ -5,6 +5,10 @@ from typing import List
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./bus_tracker.db"
+    ASYNC_DATABASE: bool = True  # use asyncpg/aiosqlite for async handlers when installed
+    # Postgres connections per worker process, split between the sync and async engines
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20  # extra connections under load; total per worker is the sum
     
     # Redis (optional)
     REDIS_URL: str = "redis://localhost:6379"
@@ -13,11 +17,71 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-this-in-production-make-it-very-long-and-random-12345"
     ALGORITHM: str = "HS256"
     
+    # Password hashing (bcrypt runs in a small process pool)
+    BCRYPT_ROUNDS: int = 12  # changing this rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_CONCURRENCY: int = 4  # hashes queued or running per worker process
+    
+    # Login throttling: failed attempts per phone number per window
+    LOGIN_MAX_ATTEMPTS: int = 5
+    LOGIN_ATTEMPT_WINDOW: int = 300  # seconds
+    
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:8080,http://localhost:5173,*"
     
     # Environment
     ENVIRONMENT: str = "development"
+    # Skip migrations and hashing-pool warm-up at boot (schema comes from migrations)
+    FAST_START: bool = False
+    
+    # Logging and metrics
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False  # one JSON object per line instead of plain text
+    LOG_SAMPLE_RATE: float = 0.01  # share of hot-path events (location updates, WS messages) logged
+    METRICS_ENABLED: bool = True  # Prometheus text format at /metrics
+    METRICS_TOKEN: str = ""  # when set, /metrics requires "Authorization: Bearer <token>"
+    
+    # Sampling profiler (admin endpoint /api/admin/system/profile)
+    PROFILER_INTERVAL: float = 0.005  # seconds between stack samples
+    PROFILER_MAX_SECONDS: int = 60
+    PROFILER_TOKEN: str = ""  # when set, requests with "X-Profile: <token>" return their profile
+    
+    # WebSocket live updates
+    WS_HEARTBEAT_INTERVAL: int = 20  # seconds between server pings
+    WS_IDLE_TIMEOUT: int = 60  # close sockets silent for this long
+    WS_MAX_CONNECTIONS: int = 500  # per worker
+    WS_RECONNECT_DELAY: int = 5  # base reconnect hint sent in close frames
+    
+    # Fleet snapshot shared by WebSocket and SSE clients
+    FLEET_SNAPSHOT_INTERVAL: float = 2.0  # seconds between rebuilds
+    SSE_KEEPALIVE_INTERVAL: int = 15  # seconds between keepalive comments
+    LONG_POLL_TIMEOUT: int = 25  # max seconds a ?since= request is parked
+    
+    # In-process lookup caches (seconds)
+    AUTH_CACHE_TTL: int = 60
+    ROUTE_CACHE_TTL: int = 60
+    
+    # Admin list counts and dropdown options, cached in Redis (seconds)
+    ADMIN_LIST_CACHE_TTL: int = 30
+    # Dashboard counts, shared by every open admin tab (seconds)
+    STATS_CACHE_TTL: int = 5
+    
+    # Location history (write-behind buffer into active_bus_locations)
+    LOCATION_HISTORY_ENABLED: bool = True
+    LOCATION_FLUSH_INTERVAL: float = 5.0
+    LOCATION_BUFFER_MAX: int = 10000
+    LOCATION_HISTORY_DAYS: int = 30  # raw fixes kept after rollup; 0 keeps forever
+    
+    # Fleet analytics rollups
+    ANALYTICS_ROLLUP_INTERVAL: int = 300  # seconds; 0 disables the periodic run
+    ANALYTICS_TIMEZONE: str = "Asia/Kolkata"  # days are cut at local midnight
+    
+    # Background jobs (imports, exports)
+    JOB_WORKERS: int = 1  # worker processes
+    JOB_DIR: str = ""  # status/result files; defaults to the system temp dir
+    JOB_RESULT_TTL: int = 3600  # seconds before job files are deleted
+    JOB_MAX_RUNTIME: int = 3600  # seconds a job may stay queued or running before it counts as lost
+    EXPORT_CACHE_DIR: str = ""  # cached route exports; defaults to the system temp dir
     
     @property
     def cors_origins_list(self) -> List[str]:
@@ -1,8 +1,65 @@
+from importlib.util import find_spec
+from typing import Optional, Tuple
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from .config import settings
 
+# libpq query options (as in managed-Postgres URLs) that asyncpg spells
+# differently, or doesn't accept at all
+ASYNCPG_QUERY_RENAMES = {"sslmode": "ssl"}
+ASYNCPG_QUERY_UNSUPPORTED = {"channel_binding"}
+
+
+def _asyncpg_url(url: str) -> str:
+    """Rewrite libpq query options for asyncpg (?sslmode=require -> ?ssl=require)."""
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    for libpq_name, asyncpg_name in ASYNCPG_QUERY_RENAMES.items():
+        if libpq_name in query:
+            value = query.pop(libpq_name)
+            query.setdefault(asyncpg_name, value)
+    for name in ASYNCPG_QUERY_UNSUPPORTED:
+        query.pop(name, None)
+    return parsed.set(query=query).render_as_string(hide_password=False)
+
+
+def _async_database_url(url: str) -> Optional[str]:
+    """Map the sync DATABASE_URL to its async driver, if that driver is installed."""
+    drivers = {
+        "sqlite://": ("sqlite+aiosqlite://", "aiosqlite"),
+        "postgresql://": ("postgresql+asyncpg://", "asyncpg"),
+        "postgresql+psycopg2://": ("postgresql+asyncpg://", "asyncpg"),
+    }
+    for prefix, (async_prefix, module) in drivers.items():
+        if url.startswith(prefix):
+            if find_spec(module) is None:
+                return None
+            async_url = async_prefix + url[len(prefix):]
+            return _asyncpg_url(async_url) if module == "asyncpg" else async_url
+    return None
+
+
+ASYNC_DATABASE_URL = _async_database_url(settings.DATABASE_URL) if settings.ASYNC_DATABASE else None
+ASYNC_DB_AVAILABLE = ASYNC_DATABASE_URL is not None
+
+
+def _pool_split(total: int, shared: bool) -> Tuple[int, int]:
+    """(sync, async) share of a per-process connection budget."""
+    if not shared:
+        return total, 0
+    return total - total // 2, total // 2
+
+
+# Both engines draw on one DB_POOL_SIZE + DB_MAX_OVERFLOW budget per worker
+# process, so adding the async engine doesn't double the Postgres connections
+_SHARED_POOL = ASYNC_DB_AVAILABLE and not ASYNC_DATABASE_URL.startswith("sqlite")
+SYNC_POOL_SIZE, ASYNC_POOL_SIZE = _pool_split(settings.DB_POOL_SIZE, _SHARED_POOL)
+SYNC_MAX_OVERFLOW, ASYNC_MAX_OVERFLOW = _pool_split(settings.DB_MAX_OVERFLOW, _SHARED_POOL)
+
 # Create database engine
 # SQLite doesn't support pool settings
 if settings.DATABASE_URL.startswith("sqlite"):
@@ -14,8 +71,8 @@ else:
     engine = create_engine(
         settings.DATABASE_URL,
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
+        pool_size=SYNC_POOL_SIZE,
+        max_overflow=SYNC_MAX_OVERFLOW
     )
 
 # Create session factory
@@ -32,3 +89,69 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ==================== ASYNC SESSIONS ====================
+
+async_engine = None
+AsyncSessionLocal = None
+
+if ASYNC_DB_AVAILABLE:
+    if ASYNC_DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    else:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_pre_ping=True,
+            pool_size=max(1, ASYNC_POOL_SIZE),  # 0 would mean unlimited
+            max_overflow=ASYNC_MAX_OVERFLOW
+        )
+    # Attributes must stay loaded after commit; async sessions can't lazy-load
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+class ThreadedAsyncSession:
+    """
+    Fallback used when no async driver (asyncpg / aiosqlite) is installed.
+    Exposes the subset of AsyncSession the routers use, running a regular
+    Session in the threadpool.
+    """
+
+    def __init__(self):
+        self._session = SessionLocal(expire_on_commit=False)
+
+    async def execute(self, statement, params=None):
+        # Buffer the rows in the worker thread, like AsyncSession does
+        frozen = await run_in_threadpool(lambda: self._session.execute(statement, params).freeze())
+        return frozen()
+
+    async def scalar(self, statement, params=None):
+        return await run_in_threadpool(self._session.scalar, statement, params)
+
+    def add(self, instance):
+        self._session.add(instance)
+
+    async def commit(self):
+        await run_in_threadpool(self._session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self._session.rollback)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self._session.refresh, instance)
+
+    async def close(self):
+        await run_in_threadpool(self._session.close)
+
+
+# Dependency for async handlers (AsyncSession, or the threaded fallback)
+async def get_async_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = ThreadedAsyncSession()
+        try:
+            yield db
+        finally:
+            await db.close()
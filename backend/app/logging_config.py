@@ -0,0 +1,64 @@
+import json
+import logging
+import random
+import sys
+from datetime import datetime, timezone
+
+from .config import settings
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra=` fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class FieldsFormatter(logging.Formatter):
+    """Plain text with `extra=` fields appended as key=value pairs."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(
+            f"{key}={value}" for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES
+        )
+        return f"{line} {fields}" if fields else line
+
+
+def configure_logging():
+    """Send app logs to stdout at LOG_LEVEL, as text or JSON (LOG_JSON)."""
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_JSON:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(FieldsFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    logger = logging.getLogger("app")
+    logger.handlers = [handler]
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    # Uvicorn configures the root logger itself; don't print twice
+    logger.propagate = False
+
+
+def log_sampled(logger: logging.Logger, message: str, level: int = logging.INFO, **fields):
+    """
+    Log a hot-path event for a LOG_SAMPLE_RATE share of calls. Skipped calls
+    cost one random() and no formatting.
+    """
+    if random.random() < settings.LOG_SAMPLE_RATE and logger.isEnabledFor(level):
+        logger.log(level, message, extra=fields)
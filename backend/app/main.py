@@ -1,20 +1,38 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 from .config import settings
-from .database import Base, engine, get_db
-from .api import auth, driver, student, routes, buses, admin
+from .database import async_engine, SessionLocal
+from . import migrator
+from .api import auth, driver, student, routes, buses, admin, analytics
+import asyncio
+import hmac
 import json
-from typing import Set
-from .services.cache_service import CacheService
-from .services.auth_service import hash_password
+import logging
+import time
+from typing import Dict, Optional
+from .services.fleet_service import fleet_snapshot, FleetSnapshot
+from .services.job_service import job_service
+from .services.location_history import location_recorder
+from .services.analytics_service import analytics_rollup
+from .services.auth_service import hash_password, start_hash_pool, shutdown_hash_pool
+from .services.metrics_service import (
+    LOCATION_BROADCAST_DELAY, PROMETHEUS_CONTENT_TYPE, WS_ACK_DELAY, WS_BROADCAST_LATENCY,
+    WS_CONNECTIONS, WS_REJECTED, RequestMetricsMiddleware, registry
+)
+from .services.profiler_service import ProfileRequestMiddleware
+from .logging_config import configure_logging, log_sampled
 from .models.driver import Driver
 import os
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Seconds a single WebSocket send may take before the client is dropped
+WS_SEND_TIMEOUT = 5
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -24,34 +42,25 @@ app = FastAPI(
 )
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database and create admin user on startup."""
-    print("🚀 Starting up...")
-    
-    # Import all models to ensure they're registered
-    from .models.bus_route import BusRoute
-    from .models.audit_log import AuditLog
-    
-    # Create all tables (including new ones)
-    print("📊 Creating/updating database tables...")
-    try:
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables ready")
-    except Exception as e:
-        print(f"❌ Error creating tables: {e}")
-    
-    # Create admin user
-    db = next(get_db())
+ADMIN_PHONE = "+919876543210"
+
+
+def ensure_admin_user():
+    """
+    Create the default admin account if it is missing. The common case (admin
+    already present) is one indexed lookup with no password hashing.
+    """
+    db = SessionLocal()
     try:
-        admin_phone = "+919876543210"
-        existing_admin = db.query(Driver).filter(Driver.phone == admin_phone).first()
+        existing_admin = db.query(Driver.driver_id, Driver.is_admin).filter(
+            Driver.phone == ADMIN_PHONE
+        ).first()
         
         if not existing_admin:
             # Create admin user
             admin_user = Driver(
                 name="Admin",
-                phone=admin_phone,
+                phone=ADMIN_PHONE,
                 email="admin@sathyabama.edu",
                 hashed_password=hash_password("admin"),
                 is_active=True,
@@ -59,15 +68,16 @@ async def startup_event():
             )
             db.add(admin_user)
             db.commit()
-            print(f"✅ Admin user created: {admin_phone} / password: admin")
-        else:
+            print(f"✅ Admin user created: {ADMIN_PHONE} / password: admin")
+        elif not existing_admin.is_admin:
             # Ensure existing user has admin privileges
-            if not existing_admin.is_admin:
-                existing_admin.is_admin = True
-                db.commit()
-                print(f"✅ Admin privileges granted to: {admin_phone}")
-            else:
-                print(f"✅ Admin user already exists: {admin_phone}")
+            db.query(Driver).filter(Driver.driver_id == existing_admin.driver_id).update(
+                {Driver.is_admin: True}
+            )
+            db.commit()
+            print(f"✅ Admin privileges granted to: {ADMIN_PHONE}")
+        else:
+            print(f"✅ Admin user already exists: {ADMIN_PHONE}")
     except Exception as e:
         print(f"❌ Error creating admin user: {e}")
         import traceback
@@ -75,11 +85,57 @@ async def startup_event():
         db.rollback()
     finally:
         db.close()
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Migrate the schema (unless FAST_START) and create the admin user, then start background tasks."""
+    print("🚀 Starting up...")
+    
+    if settings.FAST_START:
+        # Schema changes are applied by the migration step before deploy
+        print("⚡ FAST_START: skipping migrations")
+    else:
+        # Create tables on a new database, apply pending migrations otherwise
+        print("📊 Migrating database schema...")
+        try:
+            applied = await run_in_threadpool(migrator.upgrade)
+            print(f"✅ Database schema ready ({len(applied)} migrations applied)")
+        except Exception as e:
+            print(f"❌ Error migrating database: {e}")
+    
+    await run_in_threadpool(ensure_admin_user)
+    
+    if not settings.FAST_START:
+        # Spawn the password hashing workers before the first login
+        start_hash_pool()
+    
+    # Start WebSocket heartbeats and idle reaping
+    manager.start()
+    
+    # Rebuild the fleet snapshot every tick and push changes to WebSocket clients
+    fleet_snapshot.start(on_change=broadcast_snapshot)
+    
+    # Write location history in batches and roll it up into daily stats
+    location_recorder.start()
+    analytics_rollup.start()
     
     print("🎉 Startup complete!")
-    print(f"📝 Admin login: {admin_phone} / admin")
+    print(f"📝 Admin login: {ADMIN_PHONE} / admin")
     print(f"🌐 Access dashboard at: /admin/login")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and close WebSocket clients with a reconnect hint."""
+    fleet_snapshot.stop()
+    analytics_rollup.stop()
+    await location_recorder.stop()
+    job_service.shutdown()
+    shutdown_hash_pool()
+    await manager.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -89,6 +145,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request profiles for requests sent with "X-Profile: <PROFILER_TOKEN>"
+if settings.PROFILER_TOKEN:
+    app.add_middleware(ProfileRequestMiddleware)
+
+# Latency and status per route template, exposed at /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(driver.router)
@@ -96,6 +160,7 @@ app.include_router(student.router)
 app.include_router(routes.router)
 app.include_router(buses.router)
 app.include_router(admin.router)
+app.include_router(analytics.router)
 
 # Mount static files
 static_dir = os.path.join(os.path.dirname(__file__), "static")
@@ -106,29 +171,143 @@ if os.path.exists(static_dir):
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+        # Maps each socket to the monotonic time it was last heard from
+        self.active_connections: Dict[WebSocket, float] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket) -> bool:
+        """Accept a client, or reject it with a retry hint when this worker is full."""
         await websocket.accept()
-        self.active_connections.add(websocket)
+        if len(self.active_connections) >= settings.WS_MAX_CONNECTIONS:
+            await self.close(
+                websocket,
+                status.WS_1013_TRY_AGAIN_LATER,
+                "server_busy",
+                settings.WS_RECONNECT_DELAY * 2
+            )
+            return False
+        self.active_connections[websocket] = time.monotonic()
+        return True
+
+    def touch(self, websocket: WebSocket):
+        """Record that the client is still alive."""
+        if websocket in self.active_connections:
+            self.active_connections[websocket] = time.monotonic()
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
+        self.active_connections.pop(websocket, None)
+
+    async def close(self, websocket: WebSocket, code: int, reason: str, retry_after: int):
+        """Close a socket with a JSON reason carrying a reconnect hint (seconds)."""
+        self.disconnect(websocket)
+        try:
+            await websocket.close(
+                code=code,
+                reason=json.dumps({"reason": reason, "retry_after": retry_after})
+            )
+        except Exception:
+            pass
+
+    async def _send(self, websocket: WebSocket, message: dict) -> bool:
+        try:
+            await asyncio.wait_for(websocket.send_json(message), timeout=WS_SEND_TIMEOUT)
+            return True
+        except Exception:
+            self.disconnect(websocket)
+            return False
 
     async def broadcast(self, message: dict):
         """Broadcast message to all connected clients."""
-        disconnected = set()
-        for connection in self.active_connections:
+        # Failed or stalled sends drop the client inside _send
+        with WS_BROADCAST_LATENCY.time():
+            await asyncio.gather(*(
+                self._send(connection, message)
+                for connection in list(self.active_connections)
+            ))
+
+    async def heartbeat(self):
+        """Reap clients that stopped answering, then ping the rest."""
+        now = time.monotonic()
+        alive = []
+        for websocket, last_seen in list(self.active_connections.items()):
+            if now - last_seen > settings.WS_IDLE_TIMEOUT:
+                # Half-open sockets never answer pings, so they end up here
+                await self.close(
+                    websocket,
+                    status.WS_1001_GOING_AWAY,
+                    "idle_timeout",
+                    settings.WS_RECONNECT_DELAY
+                )
+            else:
+                alive.append(websocket)
+
+        ping = {"type": "ping", "timestamp": str(datetime.utcnow())}
+        await asyncio.gather(*(self._send(websocket, ping) for websocket in alive))
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL)
             try:
-                await connection.send_json(message)
-            except:
-                disconnected.add(connection)
-        
-        # Remove disconnected clients
-        self.active_connections -= disconnected
+                await self.heartbeat()
+            except Exception as e:
+                logger.warning(f"WebSocket heartbeat error: {e}")
+
+    def start(self):
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        """Stop heartbeats and tell clients to come back after the restart."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        for websocket in list(self.active_connections):
+            await self.close(
+                websocket,
+                status.WS_1012_SERVICE_RESTART,
+                "service_restart",
+                settings.WS_RECONNECT_DELAY
+            )
 
 
 manager = ConnectionManager()
+WS_CONNECTIONS.set_function(lambda: len(manager.active_connections))
+
+
+def _bus_update(snapshot: FleetSnapshot) -> dict:
+    return {
+        "type": "bus_update",
+        "buses": snapshot.buses,
+        "version": snapshot.version,
+        "timestamp": str(datetime.utcnow())
+    }
+
+
+# ingest_time of each bus's position as of the last broadcast, so every
+# position is timed once, by the broadcast that first carried it
+_broadcast_ingest_times: Dict[str, str] = {}
+
+
+def _record_broadcast(buses: list, observe: bool):
+    """Observe ingest -> broadcast delay for positions not broadcast before."""
+    now = datetime.utcnow()
+    for bus in buses:
+        ingest_time = bus.get("ingest_time")
+        if not ingest_time or _broadcast_ingest_times.get(bus["bus_number"]) == ingest_time:
+            continue
+        _broadcast_ingest_times[bus["bus_number"]] = ingest_time
+        if observe:
+            LOCATION_BROADCAST_DELAY.observe(max(0.0, (now - datetime.fromisoformat(ingest_time)).total_seconds()))
+
+
+async def broadcast_snapshot(snapshot: FleetSnapshot):
+    """Push a changed fleet snapshot to every WebSocket client."""
+    if manager.active_connections:
+        await manager.broadcast(_bus_update(snapshot))
+        _record_broadcast(snapshot.buses, observe=True)
+    else:
+        # Nobody to deliver to; don't time these positions when a client shows up
+        _record_broadcast(snapshot.buses, observe=False)
 
 
 @app.get("/")
@@ -199,38 +378,80 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus metrics for this worker process."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.METRICS_TOKEN and not hmac.compare_digest(
+        (authorization or "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.websocket("/ws/live-updates")
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time bus location updates.
     Students connect here to receive live updates.
+    The server pings every WS_HEARTBEAT_INTERVAL seconds; clients answer
+    with {"type": "pong"} or any other message to stay connected.
+    Clients may acknowledge a bus_update by echoing its timestamp,
+    {"type": "ack", "timestamp": ...}, to record delivery latency.
     """
-    await manager.connect(websocket)
-    print(f"🔌 WebSocket client connected. Total connections: {len(manager.active_connections)}")
+    if not await manager.connect(websocket):
+        WS_REJECTED.inc()
+        logger.warning("WebSocket client rejected", extra={"connections": len(manager.active_connections)})
+        return
+    logger.debug("WebSocket client connected", extra={"connections": len(manager.active_connections)})
     
     try:
         while True:
             # Wait for client message (ping/pong or viewport update)
             data = await websocket.receive_text()
-            print(f"📨 Received WebSocket message: {data}")
+            manager.touch(websocket)
             
-            # Get all active buses from Redis
-            active_buses = CacheService.get_all_active_buses()
-            print(f"🚌 Found {len(active_buses)} active buses: {[bus.get('bus_number') for bus in active_buses]}")
+            message = _parse_client_message(data)
+            if message.get("type") == "pong":
+                continue
+            if message.get("type") == "ack":
+                _record_ack(message.get("timestamp"))
+                continue
+            log_sampled(logger, "WebSocket message", level=logging.DEBUG, size=len(data))
             
-            # Send bus updates to client
-            response = {
-                "type": "bus_update",
-                "buses": active_buses,
-                "timestamp": str(datetime.utcnow())
-            }
+            # Reply from the shared fleet snapshot
+            await fleet_snapshot.ensure_fresh()
             
-            await websocket.send_json(response)
-            print(f"📤 Sent bus update to client: {len(active_buses)} buses")
+            # Send bus updates to client
+            await websocket.send_json(_bus_update(fleet_snapshot))
             
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the heartbeat already closed this socket
+        pass
+    finally:
         manager.disconnect(websocket)
-        print(f"🔌 WebSocket client disconnected. Remaining connections: {len(manager.active_connections)}")
+        logger.debug("WebSocket client disconnected", extra={"connections": len(manager.active_connections)})
+
+
+def _parse_client_message(data: str) -> dict:
+    """A client message as a dict; anything that isn't a JSON object is {}."""
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return {}
+    return message if isinstance(message, dict) else {}
+
+
+def _record_ack(timestamp) -> None:
+    """Observe broadcast -> ack delay from a bus_update timestamp the client echoed."""
+    try:
+        delay = (datetime.utcnow() - datetime.fromisoformat(timestamp)).total_seconds()
+    except (TypeError, ValueError):
+        return
+    # Echoes older than the idle timeout can't be a frame this connection just got
+    if 0 <= delay <= settings.WS_IDLE_TIMEOUT:
+        WS_ACK_DELAY.observe(delay)
 
 
 # Create a function to run the app (for Render deployment)
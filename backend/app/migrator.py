@@ -0,0 +1,277 @@
+"""
+Versioned schema migrations.
+
+Migrations are the numbered modules in backend/migrations
+(`NNN_description.py`). Each defines `upgrade(conn)` and `downgrade(conn)`;
+the runner applies pending ones in order and records every applied version
+in the schema_migrations table, so a database always knows which schema it
+is at.
+
+A migration runs in a transaction together with its version row. Set
+`TRANSACTIONAL = False` in the module for statements Postgres refuses to run
+inside a transaction (CREATE INDEX CONCURRENTLY, ATTACH PARTITION ...
+CONCURRENTLY); such migrations must be safe to re-run, because a failure
+part-way leaves the work done so far in place.
+
+The models must always describe the latest schema: an empty database is
+built from them with create_all and stamped at the newest version instead
+of replaying every migration.
+"""
+
+import importlib.util
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.engine import Connection
+
+from .database import Base, engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+MIGRATION_FILE = re.compile(r"^(\d{3})_(\w+)\.py$")
+
+# Arbitrary key for pg_advisory_lock; serialises runners across workers and deploys
+MIGRATION_LOCK_KEY = 7305190043
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class Migration:
+    """One migration file; the module is imported on first use."""
+
+    def __init__(self, version: int, name: str, path: str):
+        self.version = version
+        self.name = name
+        self.path = path
+        self._module = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            spec = importlib.util.spec_from_file_location(f"migration_{self.version:03d}", self.path)
+            self._module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(self._module)
+        return self._module
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+    def __repr__(self):
+        return f"<Migration {self.version:03d}_{self.name}>"
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Migration files in version order."""
+    migrations: Dict[int, Migration] = {}
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise RuntimeError(f"Duplicate migration version {version:03d}: {filename}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+# ==================== INDEX HELPERS ====================
+
+def create_index(conn: Connection, name: str, table: str, columns: str, unique: bool = False):
+    """
+    Create an index without blocking writes. On Postgres this is CREATE INDEX
+    CONCURRENTLY, so the migration must set TRANSACTIONAL = False. A
+    concurrent build that failed earlier leaves an invalid index behind; it is
+    dropped and rebuilt rather than skipped by IF NOT EXISTS.
+    `columns` is the raw column list, e.g. "lower(name) text_pattern_ops".
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    if conn.dialect.name == "postgresql":
+        invalid = conn.execute(text("""
+            SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :name AND NOT i.indisvalid
+        """), {"name": name}).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"))
+    else:
+        conn.execute(text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def drop_index(conn: Connection, name: str):
+    """Drop an index without blocking writes (see create_index)."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    else:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+# ==================== RUNNER ====================
+
+def _lock(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        conn.commit()
+
+
+def _unlock(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        conn.commit()
+
+
+def _applied_versions(conn: Connection) -> Dict[int, dict]:
+    rows = conn.execute(schema_migrations.select().order_by(schema_migrations.c.version)).all()
+    conn.commit()
+    return {row.version: row._asdict() for row in rows}
+
+
+def _record(conn: Connection, migration: Migration):
+    conn.execute(schema_migrations.insert().values(
+        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+    ))
+
+
+def _finish(conn: Connection, migration: Migration, direction: str):
+    if direction == "upgrade":
+        _record(conn, migration)
+    else:
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.version == migration.version))
+    conn.commit()
+
+
+def _run(conn: Connection, migration: Migration, direction: str):
+    """Run one migration step and update schema_migrations to match."""
+    step = getattr(migration.module, direction)
+    if migration.transactional:
+        try:
+            step(conn)
+            _finish(conn, migration, direction)
+        except Exception:
+            conn.rollback()
+            raise
+        return
+
+    with engine.connect() as autocommit_conn:
+        step(autocommit_conn.execution_options(isolation_level="AUTOCOMMIT"))
+    _finish(conn, migration, direction)
+
+
+def _create_from_models(conn: Connection):
+    # Every model module must be imported so its table is in Base.metadata
+    from .models import analytics, audit_log, bus, bus_route, driver, location, route  # noqa: F401
+
+    Base.metadata.create_all(bind=conn)
+    conn.commit()
+
+
+def upgrade() -> List[Migration]:
+    """
+    Bring the database to the newest version and return the migrations that
+    were applied (or stamped). Databases from before versioning are handled
+    here too: missing tables are created from the models and, on Postgres,
+    every migration is replayed (they are idempotent) so older tables get
+    the indexes added since. SQLite copies are development databases built
+    from the models, so they are only stamped.
+    """
+    migrations = discover_migrations()
+    with engine.connect() as conn:
+        _lock(conn)
+        try:
+            schema_migrations.create(bind=conn, checkfirst=True)
+            conn.commit()
+            applied = _applied_versions(conn)
+
+            if not applied:
+                tables = set(inspect(conn).get_table_names()) - {schema_migrations.name}
+                _create_from_models(conn)
+                if not tables or conn.dialect.name == "sqlite":
+                    for migration in migrations:
+                        _record(conn, migration)
+                    conn.commit()
+                    logger.info(f"Schema created from models at version {migrations[-1].version:03d}"
+                                if migrations else "Schema created from models")
+                    return migrations
+
+            pending = [m for m in migrations if m.version not in applied]
+            for migration in pending:
+                logger.info(f"Applying migration {migration.version:03d}_{migration.name}")
+                _run(conn, migration, "upgrade")
+            return pending
+        finally:
+            _unlock(conn)
+
+
+def downgrade(target: int) -> List[Migration]:
+    """Revert applied migrations newer than `target`, newest first."""
+    migrations = {m.version: m for m in discover_migrations()}
+    with engine.connect() as conn:
+        _lock(conn)
+        try:
+            applied = _applied_versions(conn)
+            reverted = []
+            for version in sorted(applied, reverse=True):
+                if version <= target:
+                    break
+                migration = migrations.get(version)
+                if migration is None:
+                    raise RuntimeError(f"Migration {version:03d} is applied but its file is missing")
+                logger.info(f"Reverting migration {migration.version:03d}_{migration.name}")
+                _run(conn, migration, "downgrade")
+                reverted.append(migration)
+            return reverted
+        finally:
+            _unlock(conn)
+
+
+def stamp(version: Optional[int] = None) -> List[Migration]:
+    """
+    Mark migrations up to `version` (default: all) as applied without running
+    them, for databases whose schema was already changed by hand.
+    """
+    migrations = discover_migrations()
+    with engine.connect() as conn:
+        _lock(conn)
+        try:
+            schema_migrations.create(bind=conn, checkfirst=True)
+            conn.commit()
+            applied = _applied_versions(conn)
+            stamped = [
+                m for m in migrations
+                if m.version not in applied and (version is None or m.version <= version)
+            ]
+            for migration in stamped:
+                _record(conn, migration)
+            conn.commit()
+            return stamped
+        finally:
+            _unlock(conn)
+
+
+def status() -> List[dict]:
+    """Every known migration with its applied_at (None when pending)."""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(schema_migrations.name):
+            applied = {}
+        else:
+            applied = _applied_versions(conn)
+    return [
+        {
+            "version": m.version,
+            "name": m.name,
+            "applied_at": applied.get(m.version, {}).get("applied_at")
+        }
+        for m in discover_migrations()
+    ]
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Index, UniqueConstraint
+from ..database import Base
+
+
+class BusDailyStats(Base):
+    """Per-bus, per-day rollup of active_bus_locations (see analytics_service)."""
+    __tablename__ = "bus_daily_stats"
+    
+    stat_id = Column(Integer, primary_key=True, index=True)
+    stat_date = Column(Date, nullable=False)  # local date (ANALYTICS_TIMEZONE)
+    bus_number = Column(String(20), nullable=False)
+    route_id = Column(Integer, nullable=True)  # bus_routes.route_id
+    fix_count = Column(Integer, nullable=False, default=0)
+    distance_km = Column(Float, nullable=False, default=0.0)
+    moving_seconds = Column(Float, nullable=False, default=0.0)
+    idle_seconds = Column(Float, nullable=False, default=0.0)
+    max_speed_kmh = Column(Float, nullable=False, default=0.0)
+    first_fix_at = Column(DateTime(timezone=True), nullable=True)
+    last_fix_at = Column(DateTime(timezone=True), nullable=True)
+    # Last position, so the next incremental run can continue the day's track
+    last_latitude = Column(Float, nullable=True)
+    last_longitude = Column(Float, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint('stat_date', 'bus_number', name='uq_bus_daily_stats_date_bus'),
+        Index('idx_bus_daily_stats_route_date', 'route_id', 'stat_date'),
+    )
+    
+    @property
+    def avg_speed_kmh(self) -> float:
+        """Average speed while moving."""
+        if not self.moving_seconds:
+            return 0.0
+        return self.distance_km / (self.moving_seconds / 3600)
+    
+    def __repr__(self):
+        return f"<BusDailyStats {self.bus_number} {self.stat_date} {self.distance_km:.1f}km>"
+
+
+class RollupWatermark(Base):
+    """How far each rollup has read its source table."""
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String(50), primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<RollupWatermark {self.name} @ {self.watermark}>"
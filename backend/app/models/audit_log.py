@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -18,5 +18,11 @@ class AuditLog(Base):
     # Relationships
     admin = relationship("Driver", back_populates="audit_logs")
     
+    __table_args__ = (
+        # Keyset pagination, unfiltered and filtered by action
+        Index("idx_audit_logs_created_at_id", created_at, log_id),
+        Index("idx_audit_logs_action_created_at", action_type, created_at),
+    )
+    
     def __repr__(self):
         return f"<AuditLog {self.action_type} {self.entity_type} by admin {self.admin_id}>"
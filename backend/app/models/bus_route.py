@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from ..database import Base
 
 
@@ -17,10 +18,21 @@ class BusRoute(Base):
     phone_number = Column(String(15), nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set in Python: SQLite's now() has 1 s resolution and the export ETag
+    # (routes_version) must change on every edit
+    updated_at = Column(DateTime(timezone=True), onupdate=datetime.utcnow)
     
     # Relationships
     driver = relationship("Driver", back_populates="routes")
     
+    __table_args__ = (
+        # Student route list (active routes in sl_no order)
+        Index("idx_bus_routes_active_sl_no", is_active, sl_no),
+        # Admin list, exports and next_sl_no
+        Index("idx_bus_routes_sl_no_id", sl_no, route_id),
+        # Driver profile (the driver's active route)
+        Index("idx_bus_routes_driver_active", driver_id, is_active),
+    )
+    
     def __repr__(self):
         return f"<BusRoute {self.route_no} - {self.vehicle_no}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -21,5 +21,20 @@ class Driver(Base):
     routes = relationship("BusRoute", back_populates="driver")
     audit_logs = relationship("AuditLog", back_populates="admin")
     
+    __table_args__ = (
+        # Keyset pagination for the admin driver list
+        Index("idx_drivers_created_at_id", created_at, driver_id),
+        # Prefix search (LIKE 'term%') on name, email and phone
+        Index(
+            "idx_drivers_name_lower", func.lower(name).label("name_lower"),
+            postgresql_ops={"name_lower": "text_pattern_ops"}
+        ),
+        Index(
+            "idx_drivers_email_lower", func.lower(email).label("email_lower"),
+            postgresql_ops={"email_lower": "text_pattern_ops"}
+        ),
+        Index("idx_drivers_phone_pattern", phone, postgresql_ops={"phone": "text_pattern_ops"}),
+    )
+    
     def __repr__(self):
         return f"<Driver {self.name} ({self.phone})>"
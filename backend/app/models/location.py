@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index
 from sqlalchemy.sql import func
+from datetime import datetime
 from ..database import Base
 
 
@@ -7,14 +8,17 @@ class ActiveBusLocation(Base):
     __tablename__ = "active_bus_locations"
     
     location_id = Column(Integer, primary_key=True, index=True)
-    bus_number = Column(String(10), nullable=False, index=True)
+    bus_number = Column(String(20), nullable=False, index=True)
     route_id = Column(Integer, nullable=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
-    speed = Column(Float, nullable=True)  # km/h
+    speed = Column(Float, nullable=True)  # km/h (converted from the device's m/s at ingest)
     heading = Column(Float, nullable=True)  # degrees
     accuracy = Column(Float, nullable=True)  # meters
     recorded_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # When the row was written; fixes retried after an outage are recorded long before.
+    # The analytics rollup reads by this, so late fixes are still picked up.
+    ingested_at = Column(DateTime(timezone=True), default=datetime.utcnow, index=True)
     
     # Composite index for efficient latest location queries
     __table_args__ = (
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -15,5 +15,10 @@ class Route(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # Route list (newest first)
+        Index("idx_routes_created_at", created_at),
+    )
+    
     def __repr__(self):
         return f"<Route {self.route_name} - {self.total_distance_km}km>"
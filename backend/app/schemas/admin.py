@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Any
 from datetime import datetime
 
 
@@ -41,6 +41,14 @@ class DriverListResponse(BaseModel):
     total: int
     page: int
     pages: int
+    next_cursor: Optional[str] = None
+
+
+class DriverOption(BaseModel):
+    driver_id: int
+    name: str
+    phone: str
+    is_active: bool
 
 
 # Bus Route Schemas
@@ -65,6 +73,10 @@ class RouteUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class RouteReorder(BaseModel):
+    route_ids: List[int]  # new order from the top; unlisted routes follow
+
+
 class RouteResponse(BaseModel):
     route_id: int
     sl_no: int
@@ -126,3 +138,17 @@ class AuditLogListResponse(BaseModel):
     total: int
     page: int
     pages: int
+    next_cursor: Optional[str] = None
+
+
+# Background Job Schemas
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued, running, completed, failed
+    progress: int = 0  # rows processed so far
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[Any] = None
@@ -0,0 +1,54 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date, datetime
+
+
+class BusDailyStatsResponse(BaseModel):
+    stat_date: date
+    bus_number: str
+    route_id: Optional[int]
+    fix_count: int
+    distance_km: float
+    moving_seconds: float
+    idle_seconds: float
+    max_speed_kmh: float
+    avg_speed_kmh: float  # while moving
+    first_fix_at: Optional[datetime]
+    last_fix_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
+class RouteDailyStatsResponse(BaseModel):
+    route_id: Optional[int]
+    route_no: Optional[str]
+    stat_date: date
+    bus_days: int
+    distance_km: float
+    moving_seconds: float
+    idle_seconds: float
+    max_speed_kmh: float
+    avg_speed_kmh: float
+    first_fix_at: Optional[datetime]
+    last_fix_at: Optional[datetime]
+
+
+class FleetSummaryResponse(BaseModel):
+    start_date: date
+    end_date: date
+    buses: int
+    bus_days: int
+    distance_km: float
+    moving_seconds: float
+    idle_seconds: float
+    max_speed_kmh: float
+    avg_speed_kmh: float
+    first_fix_at: Optional[datetime]
+    last_fix_at: Optional[datetime]
+
+
+class RollupResponse(BaseModel):
+    fixes: int
+    bus_days: int
+    watermark: datetime
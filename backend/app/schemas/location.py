@@ -8,7 +8,7 @@ class LocationUpdate(BaseModel):
     route_id: Optional[int] = None
     latitude: float = Field(..., ge=-90, le=90)
     longitude: float = Field(..., ge=-180, le=180)
-    speed: Optional[float] = Field(None, ge=0)
+    speed: Optional[float] = Field(None, ge=0)  # m/s from the device
     heading: Optional[float] = Field(None, ge=0, lt=360)
     accuracy: Optional[float] = Field(None, ge=0)
 
@@ -19,7 +19,7 @@ class BusLocationResponse(BaseModel):
     route_name: Optional[str]
     latitude: float
     longitude: float
-    speed: Optional[float]
+    speed: Optional[float]  # km/h
     heading: Optional[float]
     last_update: datetime
     status: str  # "moving", "stopped", "idle"
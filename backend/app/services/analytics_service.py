@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import math
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.analytics import BusDailyStats, RollupWatermark
+from ..models.bus_route import BusRoute
+from ..models.location import ActiveBusLocation
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = "bus_daily_stats"
+
+# Fixes written less than this long ago are left for the next run: other
+# workers' inserts from the same moment may not be committed yet
+ROLLUP_SETTLE_SECONDS = 60
+
+# Rows fetched per round trip while reading fixes
+ROLLUP_CHUNK_SIZE = 1000
+
+# Gaps between fixes longer than this (app closed, no signal) count as neither
+# moving nor idle time
+MAX_SEGMENT_GAP_SECONDS = 300
+
+# Same threshold the live status uses for "moving"
+MOVING_SPEED_KMH = 5.0
+
+# Faster segments are GPS jumps, not driving
+MAX_PLAUSIBLE_SPEED_KMH = 150.0
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes; everything is stored in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def local_date(value: datetime) -> date:
+    """Calendar date of a UTC timestamp in ANALYTICS_TIMEZONE."""
+    return _as_utc(value).astimezone(ZoneInfo(settings.ANALYTICS_TIMEZONE)).date()
+
+
+def _add_fix(stats: BusDailyStats, fix) -> None:
+    """Extend a bus-day with the next fix (fixes arrive in time order)."""
+    recorded_at = _as_utc(fix.recorded_at)
+
+    if stats.last_fix_at is not None and recorded_at < _as_utc(stats.last_fix_at):
+        # Written late (retried after a database outage) and older than the
+        # track rolled up so far: count it, but don't rewind the track
+        stats.fix_count += 1
+        if fix.speed is not None and fix.speed <= MAX_PLAUSIBLE_SPEED_KMH:
+            stats.max_speed_kmh = max(stats.max_speed_kmh, fix.speed)
+        stats.first_fix_at = min(_as_utc(stats.first_fix_at), recorded_at)
+        return
+
+    if stats.last_fix_at is not None:
+        seconds = (recorded_at - _as_utc(stats.last_fix_at)).total_seconds()
+        if 0 < seconds <= MAX_SEGMENT_GAP_SECONDS:
+            distance = haversine_km(
+                stats.last_latitude, stats.last_longitude, fix.latitude, fix.longitude
+            )
+            speed = distance / (seconds / 3600)
+            if speed <= MAX_PLAUSIBLE_SPEED_KMH:
+                stats.distance_km += distance
+                if speed >= MOVING_SPEED_KMH:
+                    stats.moving_seconds += seconds
+                else:
+                    stats.idle_seconds += seconds
+
+    stats.fix_count += 1
+    # Stored speeds are km/h; update_location converts the device's m/s
+    if fix.speed is not None and fix.speed <= MAX_PLAUSIBLE_SPEED_KMH:
+        stats.max_speed_kmh = max(stats.max_speed_kmh, fix.speed)
+    if fix.route_id is not None:
+        stats.route_id = fix.route_id
+    if stats.first_fix_at is None:
+        stats.first_fix_at = recorded_at
+    stats.last_fix_at = recorded_at
+    stats.last_latitude = fix.latitude
+    stats.last_longitude = fix.longitude
+
+
+def run_rollup(db: Session) -> dict:
+    """
+    Fold fixes written since the last run into bus_daily_stats, reading each
+    fix once. The window is on ingested_at, not recorded_at, so fixes that
+    reach the database late are still read. The watermark is advanced with a compare-and-set in the same
+    transaction, so if two workers run at once only one commit wins.
+    Returns counts for the run.
+    """
+    state = db.get(RollupWatermark, ROLLUP_NAME)
+    since = state.watermark if state else datetime(1970, 1, 1)
+    cutoff = datetime.utcnow() - timedelta(seconds=ROLLUP_SETTLE_SECONDS)
+    if cutoff <= since:
+        return {"fixes": 0, "bus_days": 0, "watermark": since}
+
+    in_window = (ActiveBusLocation.ingested_at > since, ActiveBusLocation.ingested_at <= cutoff)
+    first_fix = db.query(func.min(ActiveBusLocation.recorded_at)).filter(*in_window).scalar()
+
+    fixes = 0
+    touched: Dict[Tuple[date, str], BusDailyStats] = {}
+    if first_fix is not None:
+        # Existing rows the new fixes can extend, in one query
+        existing = db.query(BusDailyStats).filter(
+            BusDailyStats.stat_date >= local_date(first_fix)
+        ).all()
+        days = {(row.stat_date, row.bus_number): row for row in existing}
+
+        rows = (
+            db.query(
+                ActiveBusLocation.bus_number,
+                ActiveBusLocation.route_id,
+                ActiveBusLocation.latitude,
+                ActiveBusLocation.longitude,
+                ActiveBusLocation.speed,
+                ActiveBusLocation.recorded_at
+            )
+            .filter(*in_window)
+            .order_by(ActiveBusLocation.recorded_at, ActiveBusLocation.location_id)
+            .yield_per(ROLLUP_CHUNK_SIZE)
+        )
+        for fix in rows:
+            key = (local_date(fix.recorded_at), fix.bus_number)
+            stats = days.get(key)
+            if stats is None:
+                stats = BusDailyStats(
+                    stat_date=key[0], bus_number=fix.bus_number, fix_count=0,
+                    distance_km=0.0, moving_seconds=0.0, idle_seconds=0.0, max_speed_kmh=0.0
+                )
+                db.add(stats)
+                days[key] = stats
+            _add_fix(stats, fix)
+            touched[key] = stats
+            fixes += 1
+
+    if state is None:
+        db.add(RollupWatermark(name=ROLLUP_NAME, watermark=cutoff, updated_at=datetime.utcnow()))
+    else:
+        advanced = db.execute(
+            update(RollupWatermark)
+            .where(RollupWatermark.name == ROLLUP_NAME, RollupWatermark.watermark == since)
+            .values(watermark=cutoff, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if advanced.rowcount != 1:
+            db.rollback()
+            logger.info("Analytics rollup skipped: another worker advanced the watermark")
+            return {"fixes": 0, "bus_days": 0, "watermark": since}
+    db.commit()
+
+    # Raw fixes are only kept for LOCATION_HISTORY_DAYS once rolled up
+    if settings.LOCATION_HISTORY_DAYS > 0:
+        expire_before = min(cutoff, datetime.utcnow() - timedelta(days=settings.LOCATION_HISTORY_DAYS))
+        db.execute(delete(ActiveBusLocation).where(ActiveBusLocation.ingested_at < expire_before))
+        db.commit()
+
+    return {"fixes": fixes, "bus_days": len(touched), "watermark": cutoff}
+
+
+# ==================== REPORTS ====================
+
+def default_range(start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date]:
+    """Requested range, defaulting to the last 7 local days."""
+    end_date = end_date or local_date(datetime.utcnow())
+    start_date = start_date or end_date - timedelta(days=6)
+    return start_date, end_date
+
+
+def bus_daily_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    bus_number: Optional[str] = None,
+    route_id: Optional[int] = None
+) -> List[BusDailyStats]:
+    query = db.query(BusDailyStats).filter(
+        BusDailyStats.stat_date >= start_date, BusDailyStats.stat_date <= end_date
+    )
+    if bus_number:
+        query = query.filter(BusDailyStats.bus_number == bus_number)
+    if route_id is not None:
+        query = query.filter(BusDailyStats.route_id == route_id)
+    return query.order_by(BusDailyStats.stat_date.desc(), BusDailyStats.bus_number).all()
+
+
+def _totals():
+    return (
+        func.count(BusDailyStats.stat_id).label("bus_days"),
+        func.coalesce(func.sum(BusDailyStats.distance_km), 0.0).label("distance_km"),
+        func.coalesce(func.sum(BusDailyStats.moving_seconds), 0.0).label("moving_seconds"),
+        func.coalesce(func.sum(BusDailyStats.idle_seconds), 0.0).label("idle_seconds"),
+        func.coalesce(func.max(BusDailyStats.max_speed_kmh), 0.0).label("max_speed_kmh"),
+        func.min(BusDailyStats.first_fix_at).label("first_fix_at"),
+        func.max(BusDailyStats.last_fix_at).label("last_fix_at"),
+    )
+
+
+def _avg_speed(distance_km: float, moving_seconds: float) -> float:
+    return distance_km / (moving_seconds / 3600) if moving_seconds else 0.0
+
+
+def route_daily_report(db: Session, start_date: date, end_date: date) -> List[dict]:
+    """Per-route, per-day totals over all buses that ran the route."""
+    rows = (
+        db.query(BusDailyStats.route_id, BusDailyStats.stat_date, BusRoute.route_no, *_totals())
+        .outerjoin(BusRoute, BusRoute.route_id == BusDailyStats.route_id)
+        .filter(BusDailyStats.stat_date >= start_date, BusDailyStats.stat_date <= end_date)
+        .group_by(BusDailyStats.route_id, BusDailyStats.stat_date, BusRoute.route_no)
+        .order_by(BusDailyStats.stat_date.desc(), BusRoute.route_no)
+        .all()
+    )
+    return [
+        {**row._asdict(), "avg_speed_kmh": _avg_speed(row.distance_km, row.moving_seconds)}
+        for row in rows
+    ]
+
+
+def fleet_summary(db: Session, start_date: date, end_date: date) -> dict:
+    row = db.query(*_totals(), func.count(func.distinct(BusDailyStats.bus_number)).label("buses")).filter(
+        BusDailyStats.stat_date >= start_date, BusDailyStats.stat_date <= end_date
+    ).one()
+    return {
+        **row._asdict(),
+        "start_date": start_date,
+        "end_date": end_date,
+        "avg_speed_kmh": _avg_speed(row.distance_km, row.moving_seconds)
+    }
+
+
+# ==================== SCHEDULE ====================
+
+class AnalyticsRollup:
+    """Runs run_rollup every ANALYTICS_ROLLUP_INTERVAL seconds (0 disables)."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def run() -> dict:
+        db = SessionLocal()
+        try:
+            return run_rollup(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.ANALYTICS_ROLLUP_INTERVAL)
+            try:
+                await run_in_threadpool(self.run)
+            except Exception as e:
+                logger.warning(f"Analytics rollup failed: {e}")
+
+    def start(self):
+        if self._task is None and settings.ANALYTICS_ROLLUP_INTERVAL > 0:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+analytics_rollup = AnalyticsRollup()
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Query, Session
+
+from ..database import SessionLocal
+from ..models.audit_log import AuditLog
+from ..models.driver import Driver
+
+AUDIT_EXPORT_HEADERS = ['Log ID', 'Timestamp', 'Admin ID', 'Admin', 'Action', 'Entity', 'Entity ID', 'Changes']
+
+# Rows fetched per round trip while streaming the export
+AUDIT_EXPORT_CHUNK_SIZE = 500
+
+
+def create_audit_log(
+    db: Session,
+    admin_id: int,
+    action_type: str,
+    entity_type: str,
+    entity_id: int,
+    changes: dict = None
+) -> AuditLog:
+    """
+    Add an audit log entry to the caller's transaction. It is written by the
+    caller's commit, together with the change it records.
+    """
+    audit_log = AuditLog(
+        admin_id=admin_id,
+        action_type=action_type,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        changes=changes
+    )
+    db.add(audit_log)
+    return audit_log
+
+
+def create_audit_logs(db: Session, entries: List[dict]):
+    """
+    Write many audit log entries with one multi-row INSERT in the caller's
+    transaction. Each entry has the create_audit_log keyword arguments.
+    """
+    if entries:
+        db.execute(insert(AuditLog), entries)
+
+
+def audit_log_query(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    action_type: Optional[str] = None
+) -> Query:
+    """(AuditLog, admin name) rows matching the filters, unordered."""
+    query = db.query(AuditLog, Driver.name).join(Driver, AuditLog.admin_id == Driver.driver_id)
+
+    if start_date:
+        query = query.filter(AuditLog.created_at >= start_date)
+    if end_date:
+        query = query.filter(AuditLog.created_at <= end_date)
+    if action_type and action_type != "ALL":
+        query = query.filter(AuditLog.action_type == action_type)
+    return query
+
+
+def iter_audit_log_csv(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    action_type: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Stream the filtered audit log as CSV, newest first. Opens its own session
+    because the response body is produced after the request's dependencies exit.
+    """
+    db = SessionLocal()
+    try:
+        rows = (
+            audit_log_query(db, start_date, end_date, action_type)
+            .order_by(AuditLog.created_at.desc(), AuditLog.log_id.desc())
+            .yield_per(AUDIT_EXPORT_CHUNK_SIZE)
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(AUDIT_EXPORT_HEADERS)
+
+        for count, (log, admin_name) in enumerate(rows, start=1):
+            writer.writerow([
+                log.log_id,
+                log.created_at.isoformat() if log.created_at else "",
+                log.admin_id,
+                admin_name,
+                log.action_type,
+                log.entity_type,
+                log.entity_id,
+                json.dumps(log.changes, default=str) if log.changes else ""
+            ])
+            if count % AUDIT_EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue().encode('utf-8')
+    finally:
+        db.close()
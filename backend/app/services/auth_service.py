@@ -1,15 +1,35 @@
+import asyncio
 import bcrypt
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict, Tuple
 from ..config import settings
 
+logger = logging.getLogger(__name__)
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
+# Authenticated drivers by driver_id: (expires_at, detached Driver row).
+# Lets hot endpoints authenticate without checking out a DB connection.
+_driver_cache: Dict[int, Tuple[float, object]] = {}
+
+# bcrypt is CPU-bound for ~100-300 ms per call. Async callers run it in this
+# pool, at most PASSWORD_HASH_CONCURRENCY at a time, so a login burst can't
+# starve the event loop or the request threadpool.
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+_hash_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password using bcrypt (BCRYPT_ROUNDS unless `rounds` is given)."""
     # Truncate password to 72 bytes if needed
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -21,6 +41,109 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different BCRYPT_ROUNDS."""
+    try:
+        # $2b$<rounds>$<salt+hash>
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _pool() -> Optional[ProcessPoolExecutor]:
+    global _hash_pool
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return None  # default threadpool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # spawn: forking a threaded server process is not safe
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop `pool` if it is still the current one, so the next call starts a new pool."""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is pool:
+            _hash_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_hashing(func, *args):
+    global _hash_semaphore
+    if _hash_semaphore is None:
+        _hash_semaphore = asyncio.Semaphore(
+            max(1, settings.PASSWORD_HASH_WORKERS) * settings.PASSWORD_HASH_CONCURRENCY
+        )
+    loop = asyncio.get_running_loop()
+    async with _hash_semaphore:
+        # A worker that dies (OOM kill, segfault) breaks the whole pool:
+        # replace it once, then fall back to the threadpool so logins keep working
+        for _ in range(2):
+            pool = _pool()
+            try:
+                return await loop.run_in_executor(pool, func, *args)
+            except BrokenProcessPool:
+                logger.warning("Password hashing pool broke; starting a new one")
+                _discard_pool(pool)
+        return await loop.run_in_executor(None, func, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password in the hashing pool."""
+    # Pass rounds explicitly: pool processes load their own settings
+    return await _run_hashing(hash_password, password, settings.BCRYPT_ROUNDS)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in the hashing pool."""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+def start_hash_pool():
+    """Spawn the hashing workers up front so the first login doesn't wait for them."""
+    pool = _pool()
+    if pool is not None:
+        for _ in range(settings.PASSWORD_HASH_WORKERS):
+            pool.submit(int)
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+
+
+def _login_attempts_key(phone: str) -> str:
+    return f"login:failures:{phone}"
+
+
+def login_attempts_exceeded(phone: str) -> bool:
+    """True once a phone number has LOGIN_MAX_ATTEMPTS failures in the current window."""
+    from .cache_service import CacheService
+    
+    failures = CacheService.get_json(_login_attempts_key(phone))
+    return failures is not None and failures >= settings.LOGIN_MAX_ATTEMPTS
+
+
+def record_login_failure(phone: str):
+    from .cache_service import CacheService
+    
+    CacheService.incr(_login_attempts_key(phone), settings.LOGIN_ATTEMPT_WINDOW)
+
+
+def clear_login_failures(phone: str):
+    from .cache_service import CacheService
+    
+    CacheService.delete(_login_attempts_key(phone))
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create JWT access token.
@@ -48,6 +171,32 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
+def invalidate_cached_driver(driver_id: int):
+    """Drop a driver from the auth cache after an admin changes or deletes it."""
+    _driver_cache.pop(driver_id, None)
+
+
+def _load_driver(driver_id: int):
+    """Get a driver from the auth cache, querying the database only on a miss."""
+    from ..database import SessionLocal
+    from ..models.driver import Driver
+    
+    cached = _driver_cache.get(driver_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    
+    db = SessionLocal()
+    try:
+        driver = db.query(Driver).filter(Driver.driver_id == driver_id).first()
+    finally:
+        # Closing detaches the row; its loaded columns stay readable
+        db.close()
+    
+    if driver:
+        _driver_cache[driver_id] = (time.monotonic() + settings.AUTH_CACHE_TTL, driver)
+    return driver
+
+
 def get_current_admin(token: str = None):
     """
     Dependency to verify admin access.
@@ -98,18 +247,18 @@ def get_current_admin(token: str = None):
 
 
 def get_current_driver():
-    """Dependency to get current authenticated driver."""
+    """
+    Dependency to get current authenticated driver.
+    Drivers are served from an in-process cache for AUTH_CACHE_TTL seconds,
+    so location updates don't hold a database session.
+    """
     from fastapi import Depends, HTTPException, status
     from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-    from sqlalchemy.orm import Session
-    from ..database import get_db
-    from ..models.driver import Driver
     
     security = HTTPBearer()
     
     def verify_driver(
-        credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db)
+        credentials: HTTPAuthorizationCredentials = Depends(security)
     ):
         token = credentials.credentials
         payload = decode_access_token(token)
@@ -127,7 +276,7 @@ def get_current_driver():
                 detail="Invalid token"
             )
         
-        driver = db.query(Driver).filter(Driver.driver_id == driver_id).first()
+        driver = _load_driver(driver_id)
         if not driver:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
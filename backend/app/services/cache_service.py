@@ -7,9 +7,12 @@ except ImportError:
 
 import json
 import logging
+import threading
+import time
 from typing import Optional, List, Dict
 from datetime import datetime, timedelta
 from ..config import settings
+from .metrics_service import CACHE_REQUESTS, REDIS_LATENCY
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -20,8 +23,32 @@ redis_connection_attempted = False
 
 # In-memory fallback cache for development
 _memory_cache = {}
+# Counters are read-modify-write and incremented from threadpool workers
+_memory_counter_lock = threading.Lock()
 _active_buses = set()
 
+
+def _timed_commands(client):
+    """Record the round-trip time of every command sent through `client`."""
+    execute_command = client.execute_command
+    
+    def timed_execute_command(*args, **options):
+        start = time.perf_counter()
+        try:
+            return execute_command(*args, **options)
+        finally:
+            REDIS_LATENCY.observe(time.perf_counter() - start, command=str(args[0]).lower())
+    
+    # Every command method (get, setex, smembers, ...) goes through execute_command
+    client.execute_command = timed_execute_command
+    return client
+
+
+def _cache_label(key: str) -> str:
+    """Metric label for a key: its first two segments ("admin:drivers:count:..." -> "admin:drivers")."""
+    return ":".join(key.split(":")[:2])
+
+
 def get_redis_client():
     """Get Redis client with lazy initialization and error handling."""
     global redis_client, redis_connection_attempted
@@ -48,7 +75,7 @@ def get_redis_client():
         )
         # Test connection
         client.ping()
-        redis_client = client
+        redis_client = _timed_commands(client)
         logger.info("✅ Redis connected successfully")
         return redis_client
     except Exception as e:
@@ -85,7 +112,6 @@ class CacheService:
                 "expires": datetime.utcnow() + timedelta(seconds=ttl)
             }
             _active_buses.add(bus_number)
-            print(f"📦 Stored in memory cache: {bus_number} -> {location_data}")
             return True
     
     @staticmethod
@@ -97,8 +123,10 @@ class CacheService:
             key = f"bus:location:{bus_number}"
             try:
                 data = client.get(key)
+                CACHE_REQUESTS.inc(cache="bus:location", result="hit" if data else "miss")
                 return json.loads(data) if data else None
             except Exception as e:
+                CACHE_REQUESTS.inc(cache="bus:location", result="error")
                 logger.debug(f"Redis error: {e}")
                 return None
         else:
@@ -108,11 +136,13 @@ class CacheService:
             if key in _memory_cache:
                 cache_entry = _memory_cache[key]
                 if datetime.utcnow() < cache_entry["expires"]:
+                    CACHE_REQUESTS.inc(cache="bus:location", result="hit")
                     return cache_entry["data"]
                 else:
                     # Expired, remove it
                     del _memory_cache[key]
                     _active_buses.discard(bus_number)
+            CACHE_REQUESTS.inc(cache="bus:location", result="miss")
             return None
     
     @staticmethod
@@ -153,9 +183,30 @@ class CacheService:
             # Clean up expired buses
             _active_buses -= expired_buses
             
-            print(f"📦 Retrieved from memory cache: {len(locations)} buses")
             return locations
     
+    @staticmethod
+    def count_active_buses() -> int:
+        """
+        Number of active buses without fetching their locations (SCARD).
+        Members whose location expired stay in the set until the next
+        get_all_active_buses() sweep, which the fleet snapshot runs every tick.
+        """
+        client = get_redis_client()
+        if client:
+            try:
+                return client.scard("active_buses")
+            except Exception as e:
+                logger.debug(f"Redis error: {e}")
+                return 0
+        else:
+            now = datetime.utcnow()
+            return sum(
+                1 for bus_number in _active_buses.copy()
+                if f"bus:location:{bus_number}" in _memory_cache
+                and now < _memory_cache[f"bus:location:{bus_number}"]["expires"]
+            )
+    
     @staticmethod
     def remove_bus(bus_number: str) -> bool:
         """Remove bus from active tracking."""
@@ -201,7 +252,94 @@ class CacheService:
         key = f"route:{route_id}"
         try:
             data = client.get(key)
+            CACHE_REQUESTS.inc(cache="route", result="hit" if data else "miss")
             return json.loads(data) if data else None
         except Exception as e:
+            CACHE_REQUESTS.inc(cache="route", result="error")
             logger.debug(f"Redis error: {e}")
             return None
+    
+    @staticmethod
+    def set_json(key: str, data, ttl: int = 60) -> bool:
+        """Cache any JSON-serializable value (Redis, or memory fallback)."""
+        client = get_redis_client()
+        if client:
+            try:
+                client.setex(key, ttl, json.dumps(data, default=str))
+                return True
+            except Exception as e:
+                logger.debug(f"Redis error: {e}")
+                return False
+        else:
+            _memory_cache[key] = {
+                "data": data,
+                "expires": datetime.utcnow() + timedelta(seconds=ttl)
+            }
+            return True
+    
+    @staticmethod
+    def get_json(key: str):
+        """Get a value stored with set_json, or None if missing/expired."""
+        client = get_redis_client()
+        if client:
+            try:
+                data = client.get(key)
+                CACHE_REQUESTS.inc(cache=_cache_label(key), result="hit" if data else "miss")
+                return json.loads(data) if data else None
+            except Exception as e:
+                CACHE_REQUESTS.inc(cache=_cache_label(key), result="error")
+                logger.debug(f"Redis error: {e}")
+                return None
+        else:
+            cache_entry = _memory_cache.get(key)
+            if cache_entry is not None and datetime.utcnow() < cache_entry["expires"]:
+                CACHE_REQUESTS.inc(cache=_cache_label(key), result="hit")
+                return cache_entry["data"]
+            _memory_cache.pop(key, None)
+            CACHE_REQUESTS.inc(cache=_cache_label(key), result="miss")
+            return None
+    
+    @staticmethod
+    def incr(key: str, ttl: int) -> int:
+        """
+        Increment a counter and return its new value. The counter expires
+        `ttl` seconds after it was first incremented (a fixed window).
+        """
+        client = get_redis_client()
+        if client:
+            try:
+                # One MULTI: the counter can't be left without a TTL if the
+                # worker dies between the two commands
+                pipe = client.pipeline()
+                pipe.set(key, 0, ex=ttl, nx=True)
+                pipe.incr(key)
+                _, count = pipe.execute()
+                return count
+            except Exception as e:
+                logger.debug(f"Redis error: {e}")
+                return 0
+        else:
+            with _memory_counter_lock:
+                now = datetime.utcnow()
+                cache_entry = _memory_cache.get(key)
+                if cache_entry is None or now >= cache_entry["expires"]:
+                    cache_entry = {"data": 0, "expires": now + timedelta(seconds=ttl)}
+                    _memory_cache[key] = cache_entry
+                cache_entry["data"] += 1
+                return cache_entry["data"]
+    
+    @staticmethod
+    def delete(*keys: str) -> bool:
+        """Remove cached keys."""
+        client = get_redis_client()
+        if client:
+            try:
+                client.delete(*keys)
+                return True
+            except Exception as e:
+                logger.debug(f"Redis error: {e}")
+                return False
+        else:
+            for key in keys:
+                _memory_cache.pop(key, None)
+            return True
@@ -0,0 +1,270 @@
+import csv
+import glob
+import hashlib
+import io
+import os
+import tempfile
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from sqlalchemy import String, cast, func
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.bus_route import BusRoute
+
+EXPORT_HEADERS = ['Sl.No', 'Bus Route', 'Route No', 'Vehicle No', 'Driver Name', 'Phone Number']
+
+# Rows fetched per round trip while streaming
+EXPORT_CHUNK_SIZE = 500
+
+# Columns in EXPORT_HEADERS order
+EXPORT_COLUMNS = [
+    BusRoute.sl_no,
+    BusRoute.bus_route,
+    BusRoute.route_no,
+    BusRoute.vehicle_no,
+    BusRoute.driver_name,
+    BusRoute.phone_number,
+]
+
+# format -> (file extension, media type)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": ("pdf", "application/pdf"),
+    "csv": ("csv", "text/csv"),
+}
+
+
+def export_filename(format: str) -> str:
+    extension, _ = EXPORT_FORMATS[format]
+    return f"bus_routes_{datetime.now().strftime('%Y-%m-%d')}.{extension}"
+
+
+def _iter_route_rows(db: Session) -> Iterator[tuple]:
+    """
+    Stream export rows in sl_no order, EXPORT_CHUNK_SIZE rows at a time.
+    sl_no may have gaps after deletes, so the Sl.No column is the position.
+    """
+    rows = (
+        db.query(*EXPORT_COLUMNS)
+        .order_by(BusRoute.sl_no, BusRoute.route_id)
+        .yield_per(EXPORT_CHUNK_SIZE)
+    )
+    for position, row in enumerate(rows, start=1):
+        yield (position, *row[1:])
+
+
+def _column_widths(db: Session) -> List[float]:
+    """
+    Excel column widths from one aggregate query. Write-only sheets need
+    widths before the first row, so they can't be measured while writing.
+    """
+    lengths = db.query(*[
+        func.max(func.length(cast(column, String))) for column in EXPORT_COLUMNS
+    ]).one()
+    return [
+        min(max(len(header), length or 0) + 2, 50)
+        for header, length in zip(EXPORT_HEADERS, lengths)
+    ]
+
+
+def _write_excel(db: Session, output: BinaryIO) -> int:
+    # Imported here: openpyxl is slow to import and only needed for exports
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment
+
+    # Write-only mode streams rows to a temp file instead of building cells in memory
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Bus Routes")
+
+    for column_letter, width in zip("ABCDEF", _column_widths(db)):
+        ws.column_dimensions[column_letter].width = width
+
+    # Styled headers
+    headers = []
+    for header in EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center')
+        headers.append(cell)
+    ws.append(headers)
+
+    count = 0
+    for row in _iter_route_rows(db):
+        ws.append(list(row))
+        count += 1
+
+    wb.save(output)
+    return count
+
+
+def _write_csv(db: Session, output: BinaryIO) -> int:
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_HEADERS)
+
+    count = 0
+    for row in _iter_route_rows(db):
+        writer.writerow(row)
+        count += 1
+
+    text.detach()  # leave `output` open for the caller
+    return count
+
+
+def _csv_chunks(db: Session) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+
+    for count, row in enumerate(_iter_route_rows(db), start=1):
+        writer.writerow(row)
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_routes_csv() -> Iterator[bytes]:
+    """
+    Stream the CSV export chunk by chunk. Opens its own session because the
+    response body is produced after the request's dependencies exit.
+    """
+    db = SessionLocal()
+    try:
+        yield from _csv_chunks(db)
+    finally:
+        db.close()
+
+
+def _write_pdf(routes, output: BinaryIO):
+    # Imported here: reportlab is slow to import and only needed for exports
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+
+    doc = SimpleDocTemplate(output, pagesize=landscape(A4))
+    elements = []
+
+    # Title
+    styles = getSampleStyleSheet()
+    title = Paragraph("Sathyabama University Bus Routes", styles['Title'])
+    elements.append(title)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Date
+    date_text = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal'])
+    elements.append(date_text)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Table data
+    data = [EXPORT_HEADERS]
+    for position, route in enumerate(routes, start=1):
+        data.append([
+            str(position),
+            route.bus_route[:50] + '...' if len(route.bus_route) > 50 else route.bus_route,
+            route.route_no,
+            route.vehicle_no,
+            route.driver_name,
+            route.phone_number
+        ])
+
+    # Create table
+    table = Table(data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ]))
+
+    elements.append(table)
+    doc.build(elements)
+
+
+def write_routes_export(db: Session, format: str, output: BinaryIO) -> int:
+    """Write all routes, ordered by sl_no, to `output`. Returns the row count."""
+    if format == "excel":
+        return _write_excel(db, output)
+    if format == "csv":
+        return _write_csv(db, output)
+    if format == "pdf":
+        # The PDF table is laid out as a whole, so rows are loaded up front
+        routes = db.query(BusRoute).order_by(BusRoute.sl_no, BusRoute.route_id).all()
+        _write_pdf(routes, output)
+        return len(routes)
+    raise ValueError(f"Unsupported export format: {format}")
+
+
+# ==================== EXPORT CACHE ====================
+
+def _export_cache_dir() -> str:
+    path = settings.EXPORT_CACHE_DIR or os.path.join(tempfile.gettempdir(), "sathyabama_exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def routes_version(db: Session) -> str:
+    """
+    Short hash identifying the current contents of bus_routes, from one
+    aggregate query. Any insert, delete or update changes it.
+    """
+    row = db.query(
+        func.count(BusRoute.route_id),
+        func.max(BusRoute.route_id),
+        func.sum(BusRoute.sl_no),
+        func.max(BusRoute.created_at),
+        func.max(BusRoute.updated_at)
+    ).one()
+    return hashlib.sha1(repr(tuple(row)).encode()).hexdigest()[:16]
+
+
+def cached_routes_export(db: Session, format: str, version: str) -> str:
+    """
+    Path of the export for this table version, generating it on a miss.
+    Files are shared by all workers on the host.
+    """
+    extension, _ = EXPORT_FORMATS[format]
+    path = os.path.join(_export_cache_dir(), f"routes_{version}.{extension}")
+    if os.path.exists(path):
+        return path
+
+    # Build under a unique name so concurrent misses never serve a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=_export_cache_dir(), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            write_routes_export(db, format, output)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    # Drop artifacts for older versions of this format
+    for stale in glob.glob(os.path.join(_export_cache_dir(), f"routes_*.{extension}")):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return path
+
+
+def invalidate_export_cache():
+    """Delete every cached export; called after admin route changes."""
+    for path in glob.glob(os.path.join(_export_cache_dir(), "routes_*")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
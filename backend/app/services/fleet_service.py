@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from .cache_service import CacheService
+from .route_directory import route_directory
+
+logger = logging.getLogger(__name__)
+
+
+def _build_fleet() -> List[dict]:
+    """Read every active bus from the cache and attach its route details."""
+    buses = [
+        bus for bus in CacheService.get_all_active_buses()
+        if 'bus_number' in bus
+    ]
+    fleet = []
+    for bus in buses:
+        route = route_directory.get(bus['bus_number'])
+        fleet.append({
+            **bus,
+            "route_no": route["route_no"] if route else None,
+            "route_name": route["bus_route"] if route else bus.get('route', 'Unknown Route'),
+        })
+    fleet.sort(key=lambda bus: bus['bus_number'])
+    return fleet
+
+
+class FleetSnapshot:
+    """
+    Latest state of every active bus, rebuilt at most once per tick.
+    WebSocket and SSE clients all read this one snapshot instead of
+    querying the cache per client. `version` only advances when the
+    fleet actually changes, so clients can resume from it.
+    """
+
+    def __init__(self):
+        # `version` restarts at 0 in every process; the epoch tells
+        # versions from different processes or boots apart
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.buses: List[dict] = []
+        self.timestamp = datetime.utcnow().isoformat()
+        self._fingerprint: Optional[str] = None
+        self._refreshed_at = 0.0
+        # Created lazily so they bind to the running event loop
+        self._lock: Optional[asyncio.Lock] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _changed_event(self) -> asyncio.Event:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        return self._changed
+
+    async def refresh(self) -> bool:
+        """Rebuild the snapshot. Returns True if the fleet changed."""
+        buses = await run_in_threadpool(_build_fleet)
+        self._refreshed_at = time.monotonic()
+
+        fingerprint = json.dumps(buses, sort_keys=True, default=str)
+        if fingerprint == self._fingerprint:
+            return False
+
+        self._fingerprint = fingerprint
+        self.buses = buses
+        self.version += 1
+        self.timestamp = datetime.utcnow().isoformat()
+
+        # Wake everyone waiting on the previous version
+        changed = self._changed_event()
+        self._changed = asyncio.Event()
+        changed.set()
+        return True
+
+    def event_id(self, version: int) -> str:
+        """SSE event id for `version`, unambiguous across processes."""
+        return f"{self.epoch}-{version}"
+
+    def version_from_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        """The version an event id from this process refers to; None for any other id."""
+        epoch, _, version = (event_id or "").partition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    async def ensure_fresh(self):
+        """Refresh if the snapshot is older than one tick (e.g. ticker not running)."""
+        if time.monotonic() - self._refreshed_at < settings.FLEET_SNAPSHOT_INTERVAL:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if time.monotonic() - self._refreshed_at >= settings.FLEET_SNAPSHOT_INTERVAL:
+                await self.refresh()
+
+    async def wait_for_change(self, since: int, timeout: float) -> bool:
+        """Wait until the version differs from `since`. Returns False on timeout."""
+        if self.version != since:
+            return True
+        try:
+            await asyncio.wait_for(self._changed_event().wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self, on_change: Optional[Callable[["FleetSnapshot"], Awaitable[None]]]):
+        while True:
+            try:
+                if await self.refresh() and on_change:
+                    await on_change(self)
+            except Exception as e:
+                logger.warning(f"Fleet snapshot refresh failed: {e}")
+            await asyncio.sleep(settings.FLEET_SNAPSHOT_INTERVAL)
+
+    def start(self, on_change: Optional[Callable[["FleetSnapshot"], Awaitable[None]]] = None):
+        """Rebuild the snapshot every tick, calling `on_change` when it changes."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(on_change))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+fleet_snapshot = FleetSnapshot()
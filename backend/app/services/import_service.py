@@ -0,0 +1,148 @@
+import codecs
+import csv
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models.bus_route import BusRoute
+from .audit_service import create_audit_log, create_audit_logs
+from .route_order_service import next_sl_no
+
+REQUIRED_FIELDS = ['Bus Route', 'Route No', 'Vehicle No', 'Driver Name', 'Phone Number']
+
+# Rows per INSERT statement
+IMPORT_CHUNK_SIZE = 500
+
+
+def iter_route_rows(fileobj: BinaryIO, filename: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Yield (spreadsheet row number, row dict) without loading the whole file.
+    CSV is decoded line by line; Excel uses openpyxl's read-only mode.
+    """
+    if filename.endswith('.csv'):
+        reader = csv.DictReader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+        for idx, row in enumerate(reader, start=2):
+            yield idx, row
+        return
+
+    # Imported here: openpyxl is slow to import and only needed for Excel uploads
+    import openpyxl
+
+    wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = next(rows, None) or []
+        for idx, row in enumerate(rows, start=2):
+            if all(value is None for value in row):
+                continue  # read-only mode reports trailing blank rows
+            yield idx, dict(zip(headers, row))
+    finally:
+        wb.close()
+
+
+def import_route_file(
+    db: Session,
+    fileobj: BinaryIO,
+    filename: str,
+    progress: Optional[Callable[[int], None]] = None,
+    admin_id: Optional[int] = None
+) -> Dict:
+    """
+    Validate and insert routes from an uploaded sheet.
+    Vehicle numbers are checked against the database with one IN query,
+    duplicates inside the file are rejected, and valid rows are inserted in
+    chunks. The caller commits. Returns imported/failed counts and per-row errors.
+    `progress` is called with the number of rows read every IMPORT_CHUNK_SIZE rows.
+    With `admin_id`, each inserted route gets a CREATE audit entry (bulk
+    inserted alongside its chunk) plus one summary entry for the import.
+    """
+    errors: List[dict] = []
+    pending: Dict[str, dict] = {}
+    pending_rows: Dict[str, int] = {}
+
+    for count, (idx, row) in enumerate(iter_route_rows(fileobj, filename), start=1):
+        if progress and count % IMPORT_CHUNK_SIZE == 0:
+            progress(count)
+
+        # Validate required fields
+        missing = [f for f in REQUIRED_FIELDS if not row.get(f)]
+        if missing:
+            errors.append({
+                "row": idx,
+                "error": f"Missing fields: {', '.join(missing)}"
+            })
+            continue
+
+        vehicle_no = str(row['Vehicle No']).strip()
+        if vehicle_no in pending:
+            errors.append({
+                "row": idx,
+                "error": f"Vehicle number {vehicle_no} is duplicated in this file (row {pending_rows[vehicle_no]})"
+            })
+            continue
+
+        pending[vehicle_no] = {
+            "bus_route": str(row['Bus Route']).strip(),
+            "route_no": str(row['Route No']).strip(),
+            "vehicle_no": vehicle_no,
+            "driver_name": str(row['Driver Name']).strip(),
+            "phone_number": str(row['Phone Number']).strip(),
+            "is_active": True
+        }
+        pending_rows[vehicle_no] = idx
+
+    # Check vehicle_no uniqueness for the whole file at once
+    if pending:
+        existing = db.query(BusRoute.vehicle_no).filter(
+            BusRoute.vehicle_no.in_(list(pending))
+        ).all()
+        for (vehicle_no,) in existing:
+            errors.append({
+                "row": pending_rows[vehicle_no],
+                "error": f"Vehicle number {vehicle_no} already exists"
+            })
+            del pending[vehicle_no]
+
+    # Append after the current last route, keeping file order
+    first_sl_no = next_sl_no(db)
+    rows = sorted(pending.values(), key=lambda r: pending_rows[r["vehicle_no"]])
+    for offset, values in enumerate(rows):
+        values["sl_no"] = first_sl_no + offset
+
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        chunk = rows[start:start + IMPORT_CHUNK_SIZE]
+        if admin_id is None:
+            db.execute(insert(BusRoute), chunk)
+            continue
+
+        inserted = db.execute(
+            insert(BusRoute).returning(BusRoute.route_id, BusRoute.vehicle_no), chunk
+        ).all()
+        create_audit_logs(db, [
+            {
+                "admin_id": admin_id,
+                "action_type": "CREATE",
+                "entity_type": "route",
+                "entity_id": route_id,
+                "changes": {
+                    "action": "bulk_import",
+                    "row": pending_rows[vehicle_no],
+                    "route_no": pending[vehicle_no]["route_no"],
+                    "vehicle_no": vehicle_no
+                }
+            }
+            for route_id, vehicle_no in inserted
+        ])
+
+    errors.sort(key=lambda e: e["row"])
+    if admin_id is not None:
+        create_audit_log(
+            db, admin_id, "CREATE", "route", 0,
+            {"action": "bulk_import", "imported": len(rows), "failed": len(errors)}
+        )
+    return {
+        "imported": len(rows),
+        "failed": len(errors),
+        "errors": errors
+    }
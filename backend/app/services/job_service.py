@@ -0,0 +1,272 @@
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def job_dir() -> str:
+    path = settings.JOB_DIR or os.path.join(tempfile.gettempdir(), "sathyabama_jobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _status_path(job_id: str) -> str:
+    return os.path.join(job_dir(), f"{job_id}.json")
+
+
+def job_file_path(job_id: str, suffix: str) -> str:
+    """Path for a job's upload or result file."""
+    return os.path.join(job_dir(), f"{job_id}.{suffix}")
+
+
+def read_job(job_id: str) -> Optional[dict]:
+    # Job ids are hex uuids; anything else must not reach the filesystem
+    if not job_id.isalnum():
+        return None
+    try:
+        with open(_status_path(job_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def update_job(job_id: str, **fields) -> dict:
+    """Merge fields into a job's status file (atomic replace, safe across processes)."""
+    job = read_job(job_id) or {"job_id": job_id}
+    job.update(fields)
+    tmp_path = _status_path(job_id) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(job, f, default=str)
+    os.replace(tmp_path, _status_path(job_id))
+    return job
+
+
+# ==================== JOB HANDLERS (run in worker processes) ====================
+
+def _route_import_job(job_id: str, upload_path: str, filename: str, admin_id: int) -> dict:
+    from ..database import SessionLocal
+    from .export_service import invalidate_export_cache
+    from .import_service import import_route_file
+
+    db = SessionLocal()
+    try:
+        with open(upload_path, "rb") as f:
+            result = import_route_file(
+                db, f, filename,
+                progress=lambda rows: update_job(job_id, progress=rows),
+                admin_id=admin_id
+            )
+        db.commit()
+        invalidate_export_cache()
+        update_job(job_id, progress=result["imported"] + result["failed"])
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        os.remove(upload_path)
+
+
+def _route_export_job(job_id: str, format: str) -> dict:
+    from ..database import SessionLocal
+    from .export_service import EXPORT_FORMATS, export_filename, write_routes_export
+
+    extension, media_type = EXPORT_FORMATS[format]
+    db = SessionLocal()
+    try:
+        with open(job_file_path(job_id, "result"), "wb") as output:
+            rows = write_routes_export(db, format, output)
+    finally:
+        db.close()
+    return {
+        "rows": rows,
+        "filename": export_filename(format),
+        "media_type": media_type
+    }
+
+
+JOB_HANDLERS = {
+    "route_import": _route_import_job,
+    "route_export": _route_export_job,
+}
+
+
+def _run_job(job_id: str, kind: str, params: dict):
+    """Worker-process entry point; records the outcome in the status file."""
+    update_job(job_id, status=JOB_RUNNING, started_at=datetime.utcnow().isoformat())
+    try:
+        result = JOB_HANDLERS[kind](job_id, **params)
+        update_job(
+            job_id, status=JOB_COMPLETED, result=result,
+            finished_at=datetime.utcnow().isoformat()
+        )
+    except Exception as e:
+        update_job(
+            job_id, status=JOB_FAILED, error=str(e),
+            finished_at=datetime.utcnow().isoformat()
+        )
+
+
+# ==================== QUEUE (web process) ====================
+
+class JobService:
+    """
+    Runs heavy admin work (imports, exports) in a local process pool so it
+    doesn't compete with request handling. Job status, progress and results
+    live on disk under JOB_DIR and are removed after JOB_RESULT_TTL seconds.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded server process is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.JOB_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """Drop `pool` if it is still the current one, so the next submit starts a new pool."""
+        with self._lock:
+            if self._executor is pool:
+                self._executor = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, job_id: str, kind: str, params: dict) -> Future:
+        # A worker that dies (OOM kill, segfault) breaks the whole pool; replace it once
+        for attempt in range(2):
+            pool = self._pool()
+            try:
+                return pool.submit(_run_job, job_id, kind, params)
+            except BrokenProcessPool:
+                logger.warning("Job pool broke; starting a new one")
+                self._discard_pool(pool)
+                if attempt:
+                    raise
+
+    def submit(self, kind: str, job_id: Optional[str] = None, **params) -> dict:
+        """
+        Queue a job and return its initial status. Pass `job_id` (from
+        new_job_id) when input files were already written for the job.
+        """
+        self.cleanup_expired()
+        job_id = job_id or new_job_id()
+        job = update_job(
+            job_id, kind=kind, status=JOB_QUEUED, progress=0,
+            created_at=datetime.utcnow().isoformat()
+        )
+        try:
+            future = self._submit(job_id, kind, params)
+        except Exception as e:
+            update_job(
+                job_id, status=JOB_FAILED, error=f"Could not queue the job: {e}",
+                finished_at=datetime.utcnow().isoformat()
+            )
+            try:
+                os.remove(job_file_path(job_id, "upload"))
+            except FileNotFoundError:
+                pass
+            raise
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job
+
+    @staticmethod
+    def _on_done(job_id: str, future: Future):
+        # _run_job handles its own errors; this catches dead worker processes
+        # and jobs still queued when the pool was shut down
+        if future.cancelled():
+            logger.warning(f"Job {job_id} cancelled before it ran")
+            update_job(
+                job_id, status=JOB_FAILED,
+                error="Cancelled: the server shut down before the job ran",
+                finished_at=datetime.utcnow().isoformat()
+            )
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Job {job_id} crashed: {error}")
+            update_job(
+                job_id, status=JOB_FAILED, error=str(error),
+                finished_at=datetime.utcnow().isoformat()
+            )
+
+    def cleanup_expired(self):
+        """
+        Delete status, upload and result files older than JOB_RESULT_TTL.
+        Files of queued or running jobs are kept, for up to JOB_MAX_RUNTIME
+        past the TTL: an upload can wait in the queue longer than the TTL.
+        """
+        cutoff = time.time() - settings.JOB_RESULT_TTL
+        unfinished = {}
+        for name in os.listdir(job_dir()):
+            path = os.path.join(job_dir(), name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                job_id = name.split(".", 1)[0]
+                if job_id not in unfinished:
+                    unfinished[job_id] = self._is_unfinished(job_id)
+                # A lost job's status file was just rewritten; it expires like any other
+                if not unfinished[job_id] and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _is_unfinished(job_id: str) -> bool:
+        """
+        True for a queued or running job. One created more than
+        JOB_RESULT_TTL + JOB_MAX_RUNTIME ago lost its worker (crash, redeploy)
+        and is marked failed instead.
+        """
+        job = read_job(job_id)
+        if job is None or job.get("status") not in (JOB_QUEUED, JOB_RUNNING):
+            return False
+        try:
+            age = (datetime.utcnow() - datetime.fromisoformat(job["created_at"])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            age = float("inf")
+        if age < settings.JOB_RESULT_TTL + settings.JOB_MAX_RUNTIME:
+            return True
+        logger.warning(f"Job {job_id} lost its worker ({job['status']} for {age:.0f}s)")
+        update_job(
+            job_id, status=JOB_FAILED, error="Worker lost: the job never finished",
+            finished_at=datetime.utcnow().isoformat()
+        )
+        return False
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+job_service = JobService()
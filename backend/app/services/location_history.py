@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional
+
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.location import ActiveBusLocation
+from .route_directory import route_directory
+
+logger = logging.getLogger(__name__)
+
+
+class LocationRecorder:
+    """
+    Write-behind buffer for GPS fixes. Location updates append to an
+    in-process queue; a background task writes the queue to
+    active_bus_locations every LOCATION_FLUSH_INTERVAL seconds with one
+    multi-row INSERT, so the update endpoint never waits on the database.
+    At most LOCATION_BUFFER_MAX fixes are held; the oldest are dropped
+    first if the database is unavailable for a long time.
+    """
+
+    def __init__(self):
+        self._buffer: Deque[dict] = deque(maxlen=settings.LOCATION_BUFFER_MAX)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, bus_number: str, latitude: float, longitude: float,
+               speed: Optional[float] = None, heading: Optional[float] = None,
+               accuracy: Optional[float] = None):
+        if not settings.LOCATION_HISTORY_ENABLED:
+            return
+        route = route_directory.get(bus_number)
+        fix = {
+            "bus_number": bus_number,
+            "route_id": route["route_id"] if route else None,
+            "latitude": latitude,
+            "longitude": longitude,
+            "speed": speed,
+            "heading": heading,
+            "accuracy": accuracy,
+            "recorded_at": datetime.utcnow(),
+        }
+        with self._lock:
+            self._buffer.append(fix)
+
+    def _drain(self) -> List[dict]:
+        with self._lock:
+            fixes = list(self._buffer)
+            self._buffer.clear()
+        return fixes
+
+    def flush(self) -> int:
+        """Write buffered fixes. Returns how many were written."""
+        fixes = self._drain()
+        if not fixes:
+            return 0
+        db = SessionLocal()
+        try:
+            db.execute(insert(ActiveBusLocation), fixes)
+            db.commit()
+            return len(fixes)
+        except Exception:
+            db.rollback()
+            # Put them back ahead of anything recorded since, so the next flush
+            # retries them; past LOCATION_BUFFER_MAX the oldest fall off the front
+            with self._lock:
+                self._buffer = deque(fixes + list(self._buffer), maxlen=settings.LOCATION_BUFFER_MAX)
+            raise
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.LOCATION_FLUSH_INTERVAL)
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception as e:
+                logger.warning(f"Location history flush failed: {e}")
+
+    def start(self):
+        if self._task is None and settings.LOCATION_HISTORY_ENABLED:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            await run_in_threadpool(self.flush)
+        except Exception as e:
+            logger.warning(f"Location history flush failed: {e}")
+
+
+location_recorder = LocationRecorder()
@@ -0,0 +1,150 @@
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from starlette.responses import PlainTextResponse
+
+from ..config import settings
+
+# Innermost Python frames of a thread that is waiting, not working:
+# the event loop in select, thread pools waiting for work
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+_search_paths = sorted((os.path.abspath(path) + os.sep for path in sys.path if path), key=len, reverse=True)
+_frame_names: Dict[str, str] = {}
+
+
+def _short_filename(filename: str) -> str:
+    """Path relative to the sys.path entry it was imported from (app/api/admin.py)."""
+    name = _frame_names.get(filename)
+    if name is None:
+        name = filename
+        for prefix in _search_paths:
+            if filename.startswith(prefix):
+                name = filename[len(prefix):]
+                break
+        _frame_names[filename] = name
+    return name
+
+
+class StackSampler:
+    """
+    Statistical profiler: a background thread reads every other thread's
+    Python stack (sys._current_frames) each `interval` seconds and counts
+    identical stacks. Nothing is hooked into the profiled code, so the
+    cost is one short GIL hold per sample, and nothing at all when no
+    sampler is running.
+    """
+
+    # One sampler per process; a second concurrent profile would double the overhead
+    _active_lock = threading.Lock()
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{_short_filename(code.co_filename)}:{code.co_name}".replace(";", ","))
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, f"thread-{thread_id}").replace(";", ","))
+            stack.reverse()
+            self._stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> bool:
+        """Start sampling. Returns False if another sampler is already running."""
+        if not StackSampler._active_lock.acquire(blocking=False):
+            return False
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            StackSampler._active_lock.release()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        """
+        Brendan Gregg's collapsed format ("root;caller;callee count" per line),
+        read by flamegraph.pl, speedscope and inferno.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+class ProfileRequestMiddleware:
+    """
+    Profile a single request: when the X-Profile header matches
+    PROFILER_TOKEN, the response body is replaced by the collapsed stacks
+    sampled while the request ran (the original status is in
+    X-Profiled-Status). Only installed when PROFILER_TOKEN is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = dict(scope["headers"]).get(b"x-profile")
+        if token is None or not hmac.compare_digest(token, settings.PROFILER_TOKEN.encode()):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(settings.PROFILER_INTERVAL)
+        if not sampler.start():
+            response = PlainTextResponse("A profile is already running on this worker", status_code=409)
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def discard_response(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            collapsed = sampler.stop()
+        response = PlainTextResponse(collapsed, headers={
+            "X-Profiled-Status": str(status_code),
+            "X-Profile-Samples": str(sampler.samples),
+            "X-Profile-Seconds": f"{time.perf_counter() - started:.3f}",
+        })
+        await response(scope, receive, send)
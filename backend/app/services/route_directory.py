@@ -0,0 +1,71 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.bus_route import BusRoute
+
+
+class RouteDirectory:
+    """
+    In-process lookup of bus routes by vehicle number.
+    The whole table is small (one row per bus), so it is loaded in one query
+    and reused for ROUTE_CACHE_TTL seconds. Admin route changes call
+    `invalidate()`; other workers pick changes up when their TTL expires.
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, dict] = {}
+        self._expires = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, dict]:
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                BusRoute.route_id,
+                BusRoute.route_no,
+                BusRoute.bus_route,
+                BusRoute.vehicle_no,
+                BusRoute.driver_id,
+                BusRoute.is_active
+            ).all()
+        finally:
+            db.close()
+        return {
+            row.vehicle_no: {
+                "route_id": row.route_id,
+                "route_no": row.route_no,
+                "bus_route": row.bus_route,
+                "driver_id": row.driver_id,
+                "is_active": row.is_active
+            }
+            for row in rows
+        }
+
+    def _current(self) -> Dict[str, dict]:
+        if time.monotonic() < self._expires:
+            return self._routes
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            if time.monotonic() >= self._expires:
+                generation = self._generation
+                self._routes = self._load()
+                # Don't trust a load that raced with an invalidation
+                if generation == self._generation:
+                    self._expires = time.monotonic() + settings.ROUTE_CACHE_TTL
+            return self._routes
+
+    def get(self, vehicle_no: str) -> Optional[dict]:
+        """Get route details for a vehicle number, or None if unknown."""
+        return self._current().get(vehicle_no)
+
+    def invalidate(self):
+        """Force a reload on the next lookup."""
+        self._generation += 1
+        self._expires = 0.0
+
+
+route_directory = RouteDirectory()
@@ -0,0 +1,45 @@
+from typing import List
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from ..models.bus_route import BusRoute
+
+
+def next_sl_no(db: Session) -> int:
+    """
+    sl_no for a route appended at the end. sl_no is only an ordering key:
+    deletes leave gaps, so this is max + 1 rather than count + 1.
+    """
+    return (db.query(func.max(BusRoute.sl_no)).scalar() or 0) + 1
+
+
+def reorder_routes(db: Session, route_ids: List[int]) -> int:
+    """
+    Put `route_ids` first, in the given order, followed by every other route
+    in its current order, and renumber sl_no 1..n (closing any gaps).
+    Only rows whose sl_no changes are written, in one executemany UPDATE.
+    The caller commits. Raises ValueError for unknown or repeated ids.
+    """
+    if len(set(route_ids)) != len(route_ids):
+        raise ValueError("Route ids must not repeat")
+
+    current = db.query(BusRoute.route_id, BusRoute.sl_no).order_by(
+        BusRoute.sl_no, BusRoute.route_id
+    ).all()
+    sl_nos = dict(current)
+
+    unknown = [route_id for route_id in route_ids if route_id not in sl_nos]
+    if unknown:
+        raise ValueError(f"Unknown route ids: {', '.join(map(str, unknown))}")
+
+    listed = set(route_ids)
+    order = route_ids + [route_id for route_id, _ in current if route_id not in listed]
+    changed = [
+        {"route_id": route_id, "sl_no": position}
+        for position, route_id in enumerate(order, start=1)
+        if sl_nos[route_id] != position
+    ]
+    if changed:
+        db.execute(update(BusRoute), changed)
+    return len(changed)
@@ -0,0 +1,268 @@
+"""
+CacheService micro-benchmarks.
+
+Times the hot cache operations at several fleet sizes against each
+available backend:
+
+  * memory     the in-process fallback (_memory_cache)
+  * fakeredis  in-process Redis stand-in, if the fakeredis package is installed
+  * redis      a real server, with --redis-url (must be an empty database)
+
+fakeredis has no network round trip, so it measures the serialisation and
+command overhead of the Redis code path; a local redis-server adds the
+socket. Route caching is Redis-only, so the memory backend skips it.
+
+Usage:
+    python benchmarks/cache_bench.py
+    python benchmarks/cache_bench.py --sizes 10 100 --redis-url redis://localhost:6379/15
+    python benchmarks/cache_bench.py --compare                # diff against cache_baseline.json
+    python benchmarks/cache_bench.py --save benchmarks/cache_baseline.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(BACKEND_DIR, "benchmarks", "cache_baseline.json")
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+# Roughly the number of cache entries touched per timed batch
+ENTRIES_PER_BATCH = 20000
+
+
+def location(bus_number: str, index: int) -> dict:
+    """A location entry shaped like the one /driver/location/update caches."""
+    return {
+        "bus_number": bus_number,
+        "route_id": index,
+        "latitude": 12.8728 + index * 1e-5,
+        "longitude": 80.2219 + index * 1e-5,
+        "speed": 32.5,
+        "heading": 90.0,
+        "accuracy": 8.0,
+        "driver_name": f"Driver {index}",
+        "driver_phone": f"+9190{index:08d}",
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def route(route_id: int) -> dict:
+    """A recorded route with ~200 points, like the routes API caches."""
+    return {
+        "id": route_id,
+        "route_name": f"Route {route_id}",
+        "coordinates": [
+            {"lat": 12.8728 + i * 1e-4, "lng": 80.2219 + i * 1e-4, "seq": i} for i in range(200)
+        ],
+    }
+
+
+# ==================== BACKENDS ====================
+
+def use_backend(name: str, redis_url: Optional[str]):
+    """Point CacheService at `name`, starting from an empty cache."""
+    from app.services import cache_service
+
+    cache_service._memory_cache.clear()
+    cache_service._active_buses.clear()
+    cache_service.redis_connection_attempted = True
+    if name == "memory":
+        cache_service.redis_client = None
+        return
+
+    if name == "fakeredis":
+        import fakeredis
+        client = fakeredis.FakeRedis(decode_responses=True)
+    else:
+        client = cache_service.redis.from_url(redis_url, decode_responses=True)
+    client.flushdb()
+    cache_service.redis_client = cache_service._timed_commands(client)
+
+
+def available_backends(redis_url: Optional[str]) -> List[str]:
+    backends = ["memory"]
+    if importlib.util.find_spec("fakeredis") is not None:
+        backends.append("fakeredis")
+    else:
+        print("ℹ️  fakeredis not installed; skipping it (pip install fakeredis)")
+    if redis_url:
+        import redis
+        client = redis.from_url(redis_url, socket_connect_timeout=2)
+        client.ping()
+        if client.dbsize():
+            raise SystemExit(f"❌ Refusing to benchmark against a non-empty database: {redis_url}")
+        backends.append("redis")
+    return backends
+
+
+# ==================== OPERATIONS ====================
+
+def operations(size: int) -> List[Tuple[str, Callable[[], int], int, bool]]:
+    """
+    (name, run, entries, redis_only) per operation. `run` does one pass and
+    returns how many calls it made; `entries` is how many cache entries a
+    pass touches, which sets how many passes are timed.
+    """
+    from app.services.cache_service import CacheService
+
+    buses = [f"TN01LT{i:05d}" for i in range(size)]
+    locations = [location(bus, i) for i, bus in enumerate(buses)]
+    routes = [route(i) for i in range(min(size, 100))]
+
+    def set_locations():
+        for bus, data in zip(buses, locations):
+            CacheService.set_bus_location(bus, data)
+        return size
+
+    def get_locations():
+        for bus in buses:
+            CacheService.get_bus_location(bus)
+        return size
+
+    def get_all():
+        CacheService.get_all_active_buses()
+        return 1
+
+    def set_routes():
+        for data in routes:
+            CacheService.cache_route(data["id"], data)
+        return len(routes)
+
+    def get_routes():
+        for data in routes:
+            CacheService.get_cached_route(data["id"])
+        return len(routes)
+
+    # Reads run after the writes that fill the cache
+    return [
+        ("set_bus_location", set_locations, size, False),
+        ("get_bus_location", get_locations, size, False),
+        ("get_all_active_buses", get_all, size, False),
+        ("cache_route", set_routes, len(routes), True),
+        ("get_cached_route", get_routes, len(routes), True),
+    ]
+
+
+def measure(run: Callable[[], int], entries: int, repeat: int) -> dict:
+    """Best and median time per call over `repeat` timed batches."""
+    passes = max(1, ENTRIES_PER_BATCH // entries)
+    run()  # warm-up
+    per_call = []
+    calls = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(passes):
+            calls = run()
+        per_call.append((time.perf_counter() - start) / (passes * calls))
+    median = statistics.median(per_call)
+    return {
+        "calls": passes * calls * repeat,
+        "median_us": round(median * 1e6, 3),
+        "best_us": round(min(per_call) * 1e6, 3),
+        "ops_per_sec": round(1 / median) if median else None,
+    }
+
+
+def run_benchmarks(backends: List[str], sizes: List[int], repeat: int, redis_url: Optional[str]) -> List[dict]:
+    results = []
+    for backend in backends:
+        for size in sizes:
+            use_backend(backend, redis_url)
+            for name, run, entries, redis_only in operations(size):
+                if redis_only and backend == "memory":
+                    continue
+                stats = measure(run, entries, repeat)
+                results.append({"backend": backend, "operation": name, "fleet_size": size, **stats})
+                print(f"{backend:<10}{name:<22}{size:>7}{stats['median_us']:>12}{stats['best_us']:>12}{stats['ops_per_sec']:>12}")
+    use_backend("memory", None)
+    return results
+
+
+# ==================== REPORT ====================
+
+def _key(result: dict) -> Tuple[str, str, int]:
+    return result["backend"], result["operation"], result["fleet_size"]
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> int:
+    """
+    Print best-batch changes against a saved run; returns how many got worse
+    than `tolerance` %. Medians of microsecond timings swing by half between
+    identical runs, the fastest batch much less, so only that is compared.
+    """
+    previous: Dict[Tuple[str, str, int], dict] = {_key(r): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\n{'backend':<10}{'operation':<22}{'fleet':>7}{'baseline best':>15}{'current best':>14}{'change':>10}")
+    for result in results:
+        old = previous.get(_key(result))
+        if not old or not old["best_us"]:
+            continue
+        change = (result["best_us"] - old["best_us"]) / old["best_us"] * 100
+        worse = change > tolerance
+        regressions += worse
+        print(f"{result['backend']:<10}{result['operation']:<22}{result['fleet_size']:>7}"
+              f"{old['best_us']:>15}{result['best_us']:>14}{change:>+9.1f}%{'  ❌' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CacheService operations per backend and fleet size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="fleet sizes")
+    parser.add_argument("--backends", nargs="+", choices=["memory", "fakeredis", "redis"],
+                        help="default: every available backend")
+    parser.add_argument("--redis-url", help="empty Redis database to benchmark, e.g. redis://localhost:6379/15")
+    parser.add_argument("--repeat", type=int, default=5, help="timed batches per measurement")
+    parser.add_argument("--save", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, metavar="PATH",
+                        help="compare against saved results (default: benchmarks/cache_baseline.json)")
+    parser.add_argument("--tolerance", type=float, default=100.0,
+                        help="%% slowdown of the best batch counted as a regression with --compare (exit code 1)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    backends = available_backends(args.redis_url)
+    if args.backends:
+        missing = set(args.backends) - set(backends)
+        if missing:
+            raise SystemExit(f"❌ Backend not available: {', '.join(sorted(missing))}")
+        backends = args.backends
+
+    print(f"{'backend':<10}{'operation':<22}{'fleet':>7}{'median us':>12}{'best us':>12}{'ops/s':>12}")
+    results = run_benchmarks(backends, args.sizes, args.repeat, args.redis_url)
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+Simulated GPS traces and a replay driver.
+
+generate: drive each bus along a route polyline (Route.coordinates from the
+          database, or a synthetic route around campus) with a speed
+          profile, bus stops, GPS noise and dead zones (stretches without
+          signal), and write the fixes to a JSON file.
+replay:   post those fixes to /api/v1/driver/location/update from one
+          simulated driver per bus, in real time or sped up.
+
+Traces are deterministic for a given --seed, so two runs see exactly the
+same movement. The load test (load_test.py) drives its fleet with them.
+
+Usage (from backend/, with the server's .env so tokens verify):
+    python benchmarks/gps_traces.py generate --buses 50 --out traces.json
+    python benchmarks/gps_traces.py generate --from-db --profile congested --dead-zones 2 --out traces.json
+    python benchmarks/gps_traces.py replay traces.json --base-url http://localhost:8000 --speedup 10
+
+Replay signs a token for the driver assigned to each bus in bus_routes, so
+it needs the server's DATABASE_URL and SECRET_KEY; buses without a driver
+are skipped. Synthetic traces use SIM bus numbers, which only exist in the
+load test's own database unless --from-db is given.
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sathyabama campus, where every route ends
+CAMPUS = (12.8728, 80.2219)
+
+METERS_PER_DEGREE = 111320.0
+
+# cruise_kmh: typical speed between stops; variation: relative spread of
+# the target speed, re-drawn every 30 s; accel / decel in m/s^2
+PROFILES = {
+    "city": {"cruise_kmh": 30.0, "variation": 0.25, "accel": 0.8, "decel": 1.2},
+    "suburban": {"cruise_kmh": 45.0, "variation": 0.2, "accel": 1.0, "decel": 1.5},
+    "congested": {"cruise_kmh": 15.0, "variation": 0.5, "accel": 0.5, "decel": 1.0},
+}
+
+# Simulation step (seconds); fixes are taken every `interval` of these
+STEP_SECONDS = 1.0
+
+
+# ==================== ROUTES ====================
+
+def synthetic_route(rng: random.Random, length_km: float = 15.0) -> List[dict]:
+    """A wandering road of `length_km` ending at campus, as Route.coordinates."""
+    points = [CAMPUS]
+    heading = rng.uniform(0, 360)
+    step_m = 100.0
+    for _ in range(int(length_km * 1000 / step_m)):
+        heading = (heading + rng.gauss(0, 15)) % 360
+        lat, lng = points[-1]
+        lat += step_m * math.cos(math.radians(heading)) / METERS_PER_DEGREE
+        lng += step_m * math.sin(math.radians(heading)) / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+        points.append((lat, lng))
+    points.reverse()
+    return [{"lat": lat, "lng": lng, "seq": seq} for seq, (lat, lng) in enumerate(points)]
+
+
+def database_routes() -> List[List[dict]]:
+    """Coordinates of every recorded route with at least two points."""
+    from app.database import SessionLocal
+    from app.models.route import Route
+
+    db = SessionLocal()
+    try:
+        routes = [route.coordinates for route in db.query(Route).order_by(Route.route_id)]
+    finally:
+        db.close()
+    return [coordinates for coordinates in routes if coordinates and len(coordinates) >= 2]
+
+
+def database_buses() -> Dict[str, int]:
+    """bus_number -> driver_id for every active bus with a driver."""
+    from app.database import SessionLocal
+    from app.models.bus_route import BusRoute
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(BusRoute.vehicle_no, BusRoute.driver_id)
+            .filter(BusRoute.is_active.is_(True), BusRoute.driver_id.isnot(None))
+            .order_by(BusRoute.sl_no)
+            .all()
+        )
+    finally:
+        db.close()
+    return {vehicle_no: driver_id for vehicle_no, driver_id in rows}
+
+
+# ==================== TRACES ====================
+
+def _bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    x = math.sin(dlambda) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return math.degrees(math.atan2(x, y)) % 360
+
+
+class Polyline:
+    """Position and direction at a distance along a route."""
+
+    def __init__(self, coordinates: List[dict]):
+        from app.services.analytics_service import haversine_km
+
+        ordered = sorted(coordinates, key=lambda point: point.get("seq", 0))
+        self.points = [(point["lat"], point["lng"]) for point in ordered]
+        self.offsets_m = [0.0]
+        for (lat1, lng1), (lat2, lng2) in zip(self.points, self.points[1:]):
+            self.offsets_m.append(self.offsets_m[-1] + haversine_km(lat1, lng1, lat2, lng2) * 1000)
+        self.length_m = self.offsets_m[-1]
+
+    def at(self, distance_m: float) -> Tuple[float, float, float]:
+        """(lat, lng, heading) `distance_m` along the route."""
+        index = min(max(bisect.bisect_right(self.offsets_m, distance_m) - 1, 0), len(self.points) - 2)
+        start, end = self.offsets_m[index], self.offsets_m[index + 1]
+        fraction = (distance_m - start) / (end - start) if end > start else 0.0
+        (lat1, lng1), (lat2, lng2) = self.points[index], self.points[index + 1]
+        return (
+            lat1 + (lat2 - lat1) * fraction,
+            lng1 + (lng2 - lng1) * fraction,
+            _bearing(lat1, lng1, lat2, lng2),
+        )
+
+
+def generate_trace(
+    coordinates: List[dict],
+    rng: random.Random,
+    profile: str = "city",
+    interval: float = 5.0,
+    interval_jitter: float = 0.2,
+    stop_every_km: float = 1.0,
+    dwell_seconds: Tuple[float, float] = (15.0, 60.0),
+    noise_m: float = 5.0,
+    dead_zones: int = 0,
+    dead_zone_km: Tuple[float, float] = (0.3, 1.0),
+) -> List[dict]:
+    """
+    Fixes for one drive along `coordinates`, as dicts with the
+    LocationUpdate fields plus `t`, seconds since the start of the drive.
+
+    The bus accelerates towards a target speed drawn from the profile,
+    brakes for stops roughly every `stop_every_km` (and at the end) and
+    waits `dwell_seconds` there. A fix is taken every `interval` seconds
+    (+/- `interval_jitter` of it); fixes inside a dead zone are dropped.
+    """
+    settings = PROFILES[profile]
+    polyline = Polyline(coordinates)
+    cruise = settings["cruise_kmh"] / 3.6
+
+    stops = []
+    position = stop_every_km * 1000 * rng.uniform(0.5, 1.5)
+    while stop_every_km > 0 and position < polyline.length_m - 200:
+        stops.append(position)
+        position += stop_every_km * 1000 * rng.uniform(0.5, 1.5)
+    stops.append(polyline.length_m)
+
+    zones = []
+    for _ in range(dead_zones):
+        start = rng.uniform(0, polyline.length_m)
+        zones.append((start, start + rng.uniform(*dead_zone_km) * 1000))
+
+    fixes = []
+    t = distance = speed = dwell = 0.0
+    target = cruise
+    next_target_at = 30.0
+    next_fix_at = 0.0
+    while True:
+        if t >= next_target_at:
+            target = cruise * min(max(rng.gauss(1.0, settings["variation"]), 0.3), 1.6)
+            next_target_at = t + 30.0
+
+        if dwell > 0:
+            dwell -= STEP_SECONDS
+        else:
+            to_stop = stops[0] - distance
+            if to_stop <= speed * speed / (2 * settings["decel"]) + speed * STEP_SECONDS:
+                speed = max(speed - settings["decel"] * STEP_SECONDS, min(1.0, to_stop))
+            elif speed < target:
+                speed = min(speed + settings["accel"] * STEP_SECONDS, target)
+            else:
+                speed = max(speed - settings["decel"] * STEP_SECONDS, target)
+            distance = min(distance + speed * STEP_SECONDS, stops[0])
+            if distance >= stops[0]:
+                speed = 0.0
+                stops.pop(0)
+                if not stops:
+                    break
+                dwell = rng.uniform(*dwell_seconds)
+
+        if t >= next_fix_at:
+            next_fix_at += interval * rng.uniform(1 - interval_jitter, 1 + interval_jitter)
+            if not any(start <= distance <= end for start, end in zones):
+                fixes.append(_fix(polyline, distance, speed, t, noise_m, rng))
+        t += STEP_SECONDS
+
+    fixes.append(_fix(polyline, distance, 0.0, t, noise_m, rng))
+    return fixes
+
+
+def _fix(polyline: Polyline, distance: float, speed: float, t: float, noise_m: float, rng: random.Random) -> dict:
+    lat, lng, heading = polyline.at(distance)
+    if noise_m > 0:
+        lat += rng.gauss(0, noise_m) / METERS_PER_DEGREE
+        lng += rng.gauss(0, noise_m) / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+    return {
+        "t": round(t, 1),
+        "latitude": round(lat, 7),
+        "longitude": round(lng, 7),
+        # m/s, like the device's GPS; the server converts to km/h
+        "speed": round(max(0.0, speed + (rng.gauss(0, 0.3) if speed else 0.0)), 2),
+        "heading": round(heading, 1),
+        "accuracy": round(max(noise_m, 3.0) * rng.uniform(0.8, 2.0), 1),
+    }
+
+
+def generate_fleet(bus_numbers: List[str], routes: List[List[dict]], seed: int, **options) -> List[dict]:
+    """One trace per bus, cycling through `routes`; bus i always gets the same trace for a seed."""
+    return [
+        {
+            "bus_number": bus_number,
+            "fixes": generate_trace(routes[index % len(routes)], random.Random(f"{seed}:{bus_number}"), **options),
+        }
+        for index, bus_number in enumerate(bus_numbers)
+    ]
+
+
+# ==================== REPLAY ====================
+
+async def replay_trace(
+    client,
+    base_url: str,
+    bus_number: str,
+    token: str,
+    fixes: List[dict],
+    speedup: float = 1.0,
+    offset: float = 0.0,
+    deadline: Optional[float] = None,
+    loop: bool = False,
+    on_send: Optional[Callable[[dict, float], None]] = None,
+    on_result: Optional[Callable[[bool, float, float], None]] = None,
+):
+    """
+    Post `fixes` as one driver, each at its `t` / `speedup` after `offset`
+    seconds. `on_send(payload, sent_at)` runs before each request and
+    `on_result(ok, latency, lag)` after it, where lag is how late the send
+    was against the schedule. Stops at `deadline` (time.monotonic()), or at
+    the end of the trace unless `loop` restarts it.
+    """
+    if not fixes:
+        return
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"{base_url}/api/v1/driver/location/update"
+    start = time.monotonic() + offset
+    # Trace length plus one fix gap, so a looped trace doesn't send twice at once
+    period = fixes[-1]["t"] + (fixes[-1]["t"] - fixes[-2]["t"] if len(fixes) > 1 else 1.0)
+    lap = 0
+    while True:
+        for fix in fixes:
+            due = start + (lap * period + fix["t"]) / speedup
+            if deadline is not None and due >= deadline:
+                return
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            payload = {
+                "bus_number": bus_number,
+                "latitude": fix["latitude"],
+                "longitude": fix["longitude"],
+                "speed": fix["speed"],
+                "heading": fix["heading"],
+                "accuracy": fix["accuracy"],
+                # The simulated device takes the fix as it sends it
+                "fix_time": datetime.utcnow().isoformat(),
+            }
+            sent_at = time.monotonic()
+            if on_send:
+                on_send(payload, sent_at)
+            try:
+                response = await client.post(url, json=payload, headers=headers)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            if on_result:
+                on_result(ok, time.monotonic() - sent_at, sent_at - due)
+        if not loop:
+            return
+        lap += 1
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty sample. The load test uses it too."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    # The smallest value with at least pct% of the sample at or below it
+    rank = max(1, math.ceil(pct * len(ordered) / 100))
+    return ordered[rank - 1]
+
+
+async def replay_fleet(traces: List[dict], tokens: Dict[str, str], base_url: str, speedup: float,
+                       duration: Optional[float], loop: bool) -> dict:
+    import httpx
+
+    latencies: List[float] = []
+    lags: List[float] = []
+    errors = 0
+
+    def record(ok: bool, latency: float, lag: float):
+        nonlocal errors
+        lags.append(lag)
+        if ok:
+            latencies.append(latency)
+        else:
+            errors += 1
+
+    deadline = time.monotonic() + duration if duration else None
+    limits = httpx.Limits(max_connections=max(len(traces), 1))
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*(
+            replay_trace(client, base_url, trace["bus_number"], tokens[trace["bus_number"]], trace["fixes"],
+                         speedup=speedup, deadline=deadline, loop=loop, on_result=record)
+            for trace in traces
+        ))
+
+    p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+    return {
+        "sent": len(latencies) + errors,
+        "errors": errors,
+        "p50_ms": round(p50 * 1000, 2) if latencies else None,
+        "p99_ms": round(p99 * 1000, 2) if latencies else None,
+        "max_lag_ms": round(max(lags) * 1000, 2) if lags else None,
+    }
+
+
+# ==================== CLI ====================
+
+def cmd_generate(args):
+    if args.from_db:
+        buses = list(database_buses())[:args.buses]
+        routes = database_routes()
+        if not buses:
+            raise SystemExit("❌ No active buses with a driver in bus_routes")
+        if not routes:
+            print("ℹ️  No recorded routes in the database; using synthetic routes")
+    else:
+        buses = [f"SIM{i:04d}" for i in range(1, args.buses + 1)]
+        routes = []
+    if not routes:
+        rng = random.Random(args.seed)
+        routes = [synthetic_route(rng, args.route_km) for _ in range(min(len(buses), 20))]
+
+    traces = generate_fleet(
+        buses, routes, args.seed,
+        profile=args.profile,
+        interval=args.interval,
+        stop_every_km=args.stop_every_km,
+        noise_m=args.noise,
+        dead_zones=args.dead_zones,
+    )
+    with open(args.out, "w") as f:
+        json.dump({"seed": args.seed, "profile": args.profile, "interval_s": args.interval, "traces": traces}, f)
+    fixes = sum(len(trace["fixes"]) for trace in traces)
+    longest = max(trace["fixes"][-1]["t"] for trace in traces) / 60
+    print(f"✅ {len(traces)} traces, {fixes} fixes, longest drive {longest:.0f} min -> {args.out}")
+
+
+def cmd_replay(args):
+    from app.services.auth_service import create_access_token
+
+    with open(args.traces) as f:
+        traces = json.load(f)["traces"]
+    drivers = database_buses()
+    missing = [trace["bus_number"] for trace in traces if trace["bus_number"] not in drivers]
+    if missing:
+        print(f"⚠️  Skipping {len(missing)} buses without a driver in bus_routes: {', '.join(missing[:5])}...")
+    traces = [trace for trace in traces if trace["bus_number"] in drivers]
+    if not traces:
+        raise SystemExit("❌ Nothing to replay")
+    tokens = {
+        trace["bus_number"]: create_access_token({"driver_id": drivers[trace["bus_number"]], "is_admin": False})
+        for trace in traces
+    }
+
+    print(f"▶️  Replaying {len(traces)} buses at {args.speedup:g}x against {args.base_url}")
+    result = asyncio.run(replay_fleet(traces, tokens, args.base_url.rstrip("/"), args.speedup, args.duration, args.loop))
+    print(f"📤 {result['sent']} updates, {result['errors']} errors, "
+          f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, max schedule lag {result['max_lag_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and replay simulated bus GPS traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write traces to a JSON file")
+    generate.add_argument("--out", default="traces.json")
+    generate.add_argument("--buses", type=int, default=50)
+    generate.add_argument("--from-db", action="store_true",
+                          help="use bus_routes buses and Route.coordinates from DATABASE_URL")
+    generate.add_argument("--profile", choices=sorted(PROFILES), default="city")
+    generate.add_argument("--interval", type=float, default=5.0, help="seconds between fixes")
+    generate.add_argument("--stop-every-km", type=float, default=1.0, help="average stop spacing (0: no stops)")
+    generate.add_argument("--noise", type=float, default=5.0, help="GPS noise (meters, 1 sigma)")
+    generate.add_argument("--dead-zones", type=int, default=0, help="stretches without signal per trace")
+    generate.add_argument("--route-km", type=float, default=15.0, help="length of synthetic routes")
+    generate.add_argument("--seed", type=int, default=1)
+    generate.set_defaults(handler=cmd_generate)
+
+    replay = commands.add_parser("replay", help="post traces to a running server")
+    replay.add_argument("traces")
+    replay.add_argument("--base-url", default="http://localhost:8000")
+    replay.add_argument("--speedup", type=float, default=1.0, help="replay N times faster than real time")
+    replay.add_argument("--duration", type=float, help="stop after N seconds (wall clock)")
+    replay.add_argument("--loop", action="store_true", help="restart each trace when it ends")
+    replay.set_defaults(handler=cmd_replay)
+
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Fleet load test.
+
+Starts the app in-process (uvicorn on a free localhost port, temporary
+SQLite database, in-memory cache), then for --duration seconds:
+
+  * N drivers replay simulated GPS traces (gps_traces.py) to
+    /api/v1/driver/location/update, one fix every --update-interval seconds
+  * M students hold /ws/live-updates open, answering heartbeats
+  * P students poll /api/v1/student/buses/active every --poll-interval seconds
+
+and reports throughput, latency percentiles per endpoint and the
+end-to-end delay from a driver's POST to the first WebSocket frame that
+carries that position.
+
+Usage:
+    python benchmarks/load_test.py                          # default scenario
+    python benchmarks/load_test.py --compare                # diff against baseline.json
+    python benchmarks/load_test.py --save benchmarks/baseline.json
+
+Clients and server share one process (and one GIL), so absolute numbers are
+lower than a real deployment; compare runs on the same machine only.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import gps_traces
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(BACKEND_DIR, "benchmarks", "baseline.json")
+
+# Latencies compared against the baseline. Throughput is reported but not
+# compared: it is set by the offered load (drivers / interval, polls /
+# interval), not by how fast the server is.
+COMPARED = ("p50_ms", "p99_ms")
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> dict:
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "p50_ms": _ms(gps_traces.percentile(latencies, 50)),
+        "p90_ms": _ms(gps_traces.percentile(latencies, 90)),
+        "p99_ms": _ms(gps_traces.percentile(latencies, 99)),
+        "max_ms": _ms(max(latencies) if latencies else None),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+async def _pause(seconds: float, deadline: float):
+    """Sleep, but not past the end of the run."""
+    await asyncio.sleep(max(0.0, min(seconds, deadline - time.monotonic())))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ==================== SETUP ====================
+
+def configure(database_path: str):
+    # Must happen before the app is imported: settings are read at import time
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "REDIS_URL": "redis://127.0.0.1:1",  # nothing listens there: in-memory cache
+        "FAST_START": "true",
+        "LOG_LEVEL": "WARNING",
+        "METRICS_ENABLED": "true",
+        "WS_MAX_CONNECTIONS": "100000",
+    })
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def seed(drivers: int) -> List[Tuple[str, str]]:
+    """Create the schema, one driver and route per bus; returns (bus_number, token)."""
+    from sqlalchemy import insert
+    from app import migrator
+    from app.database import engine
+    from app.models.bus_route import BusRoute
+    from app.models.driver import Driver
+    from app.services.auth_service import create_access_token
+
+    migrator.upgrade()
+    with engine.begin() as conn:
+        conn.execute(insert(Driver), [
+            {
+                "driver_id": i, "name": f"Driver {i}", "phone": f"+9180{i:08d}",
+                "hashed_password": "-", "is_active": True, "is_admin": False,
+            }
+            for i in range(1, drivers + 1)
+        ])
+        conn.execute(insert(BusRoute), [
+            {
+                "route_id": i, "sl_no": i, "bus_route": f"Route {i} - Sathyabama",
+                "route_no": f"R{i}", "vehicle_no": f"TN01LT{i:04d}", "driver_id": i,
+                "driver_name": f"Driver {i}", "phone_number": f"80{i:08d}", "is_active": True,
+            }
+            for i in range(1, drivers + 1)
+        ])
+    return [
+        (f"TN01LT{i:04d}", create_access_token({"driver_id": i, "is_admin": False}))
+        for i in range(1, drivers + 1)
+    ]
+
+
+def start_server(port: int):
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"
+    ))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+# ==================== SIMULATED CLIENTS ====================
+
+class Recorder:
+    """Latencies and errors per endpoint, plus end-to-end delivery delays."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        # (bus_number, latitude) -> monotonic time the update was sent
+        self.sent: Dict[Tuple[str, float], float] = {}
+        self.delivery_delays: List[float] = []
+        self.frames = 0
+        self.ws_connected = 0
+        self.ws_failed = 0
+
+
+async def driver(client, base_url: str, bus_number: str, token: str, fixes: List[dict],
+                 args, recorder: Recorder, deadline: float):
+    """Replay one bus's trace until the end of the run."""
+
+    def on_send(payload: dict, sent_at: float):
+        recorder.sent[(bus_number, payload["latitude"])] = sent_at
+
+    def on_result(ok: bool, latency: float, lag: float):
+        if ok:
+            recorder.latencies["location_update"].append(latency)
+        else:
+            recorder.errors["location_update"] += 1
+
+    # Spread the first updates over one interval, like drivers starting shifts
+    await gps_traces.replay_trace(
+        client, base_url, bus_number, token, fixes,
+        offset=random.uniform(0, args.update_interval), deadline=deadline, loop=True,
+        on_send=on_send, on_result=on_result,
+    )
+
+
+async def ws_student(ws_url: str, recorder: Recorder, deadline: float):
+    """Stay connected, answer pings, and time each position's first arrival."""
+    import websockets
+
+    seen = set()
+    try:
+        async with websockets.connect(ws_url, max_size=None) as websocket:
+            recorder.ws_connected += 1
+            await websocket.send(json.dumps({"type": "hello"}))
+            while time.monotonic() < deadline:
+                try:
+                    raw = await asyncio.wait_for(websocket.recv(), timeout=deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    break
+                received = time.monotonic()
+                message = json.loads(raw)
+                if message.get("type") == "ping":
+                    await websocket.send(json.dumps({"type": "pong"}))
+                    continue
+                if message.get("type") != "bus_update":
+                    continue
+                recorder.frames += 1
+                await websocket.send(json.dumps({"type": "ack", "timestamp": message.get("timestamp")}))
+                for bus in message.get("buses", []):
+                    key = (bus.get("bus_number"), bus.get("latitude"))
+                    sent = recorder.sent.get(key)
+                    if sent is not None and key not in seen:
+                        seen.add(key)
+                        recorder.delivery_delays.append(received - sent)
+    except Exception:
+        recorder.ws_failed += 1
+
+
+async def poll_student(client, base_url: str, args, recorder: Recorder, deadline: float):
+    await _pause(random.uniform(0, args.poll_interval), deadline)
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            response = await client.get(f"{base_url}/api/v1/student/buses/active")
+            if response.status_code == 200:
+                recorder.latencies["buses_active"].append(time.monotonic() - started)
+            else:
+                recorder.errors["buses_active"] += 1
+        except Exception:
+            recorder.errors["buses_active"] += 1
+        await _pause(args.poll_interval * random.uniform(0.8, 1.2), deadline)
+
+
+async def run_load(port: int, fleet: List[Tuple[str, str]], traces: List[dict], args) -> Tuple[Recorder, float]:
+    import httpx
+
+    base_url = f"http://127.0.0.1:{port}"
+    ws_url = f"ws://127.0.0.1:{port}/ws/live-updates"
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.drivers + args.poll_students)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        tasks = [ws_student(ws_url, recorder, deadline) for _ in range(args.ws_students)]
+        tasks += [
+            driver(client, base_url, bus_number, token, trace["fixes"], args, recorder, deadline)
+            for (bus_number, token), trace in zip(fleet, traces)
+        ]
+        tasks += [poll_student(client, base_url, args, recorder, deadline) for _ in range(args.poll_students)]
+        await asyncio.gather(*tasks)
+        return recorder, time.monotonic() - started
+
+
+# ==================== REPORT ====================
+
+def build_report(recorder: Recorder, elapsed: float, args) -> dict:
+    endpoints = {
+        name: summarize(recorder.latencies[name], recorder.errors[name], elapsed)
+        for name in ("location_update", "buses_active")
+    }
+    delays = recorder.delivery_delays
+    return {
+        "scenario": {
+            "drivers": args.drivers,
+            "ws_students": args.ws_students,
+            "poll_students": args.poll_students,
+            "duration_s": args.duration,
+            "update_interval_s": args.update_interval,
+            "profile": args.profile,
+            "poll_interval_s": args.poll_interval,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "endpoints": endpoints,
+        "websocket": {
+            "connected": recorder.ws_connected,
+            "failed": recorder.ws_failed,
+            "frames": recorder.frames,
+            "delivery_p50_ms": _ms(gps_traces.percentile(delays, 50)),
+            "delivery_p99_ms": _ms(gps_traces.percentile(delays, 99)),
+            "delivery_max_ms": _ms(max(delays) if delays else None),
+            "deliveries": len(delays),
+        },
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{'endpoint':<18}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:<18}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>10}"
+              f"{_cell(stats['p50_ms'])}{_cell(stats['p90_ms'])}{_cell(stats['p99_ms'])}{_cell(stats['max_ms'])}")
+    ws = report["websocket"]
+    print(f"\nWebSocket: {ws['connected']} connected, {ws['failed']} failed, {ws['frames']} frames")
+    print(f"Location -> client delay: p50 {ws['delivery_p50_ms']} ms, p99 {ws['delivery_p99_ms']} ms, "
+          f"max {ws['delivery_max_ms']} ms ({ws['deliveries']} deliveries)")
+
+
+def _cell(value) -> str:
+    return f"{'-' if value is None else value:>10}"
+
+
+def _compared_values(report: dict) -> Dict[str, Optional[float]]:
+    values = {}
+    for name, stats in report["endpoints"].items():
+        for metric in COMPARED:
+            values[f"{name}.{metric}"] = stats[metric]
+    values["websocket.delivery_p50_ms"] = report["websocket"]["delivery_p50_ms"]
+    values["websocket.delivery_p99_ms"] = report["websocket"]["delivery_p99_ms"]
+    return values
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> int:
+    """
+    Print latency changes against the baseline; returns how many got more
+    than `tolerance` % slower, plus endpoints with more errors than before.
+    """
+    if baseline.get("scenario") != report["scenario"]:
+        print("\n⚠️  Scenario differs from the baseline; the comparison is only indicative")
+    regressions = 0
+    current = _compared_values(report)
+    print(f"\n{'metric':<34}{'baseline':>12}{'current':>12}{'change':>10}")
+    for key, old in _compared_values(baseline).items():
+        new = current.get(key)
+        if old in (None, 0) or new is None:
+            continue
+        change = (new - old) / old * 100
+        worse = change > tolerance
+        regressions += worse
+        print(f"{key:<34}{old:>12}{new:>12}{change:>+9.1f}%{'  ❌' if worse else ''}")
+    for name, stats in report["endpoints"].items():
+        old_errors = baseline["endpoints"].get(name, {}).get("errors", 0)
+        if stats["errors"] > old_errors:
+            regressions += 1
+            print(f"{name + '.errors':<34}{old_errors:>12}{stats['errors']:>12}{'':>10}  ❌")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of drivers and students against the app")
+    parser.add_argument("--drivers", type=int, default=50)
+    parser.add_argument("--ws-students", type=int, default=200)
+    parser.add_argument("--poll-students", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--update-interval", type=float, default=5.0, help="seconds between a driver's updates")
+    parser.add_argument("--poll-interval", type=float, default=10.0, help="seconds between a student's polls")
+    parser.add_argument("--profile", choices=sorted(gps_traces.PROFILES), default="city",
+                        help="driving profile of the simulated buses")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", metavar="PATH", help="write the report as JSON (e.g. the baseline)")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, metavar="PATH",
+                        help="compare against a saved report (default: benchmarks/baseline.json)")
+    parser.add_argument("--tolerance", type=float, default=25.0,
+                        help="%% change counted as a regression with --compare (exit code 1)")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(os.path.join(tmp, "load_test.db"))
+        fleet = seed(args.drivers)
+        routes = [gps_traces.synthetic_route(random.Random(f"{args.seed}:route:{i}")) for i in range(20)]
+        traces = gps_traces.generate_fleet(
+            [bus_number for bus_number, _ in fleet], routes, args.seed,
+            profile=args.profile, interval=args.update_interval,
+        )
+        port = _free_port()
+        server, thread = start_server(port)
+        print(f"🚌 {args.drivers} drivers, 🔌 {args.ws_students} WebSocket students, "
+              f"🔄 {args.poll_students} polling students for {args.duration:.0f}s")
+        try:
+            recorder, elapsed = asyncio.run(run_load(port, fleet, traces, args))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    report = build_report(recorder, elapsed, args)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
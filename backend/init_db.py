@@ -5,21 +5,22 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app.database import Base, engine, SessionLocal
+from app import migrator
+from app.database import SessionLocal
 from app.models.driver import Driver
-from app.models.bus_route import BusRoute
-from app.models.audit_log import AuditLog
 from app.services.auth_service import hash_password
 
 def init_db():
-    """Create all tables and admin user"""
+    """Migrate the schema to the newest version and create the admin user"""
     print("🔄 Initializing database...")
     
     try:
-        # Create all tables
-        print("📊 Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✅ Tables created: drivers, bus_routes, audit_logs")
+        # Create tables on a new database, apply pending migrations otherwise
+        print("📊 Migrating database schema...")
+        applied = migrator.upgrade()
+        for migration in applied:
+            print(f"   {migration.version:03d}_{migration.name}")
+        print("✅ Schema is at the newest version")
         
         # Create admin user if not exists
         db = SessionLocal()
@@ -0,0 +1,50 @@
+"""
+Apply database migrations (see app/migrator.py)
+
+Usage:
+    python migrate.py                  # upgrade to the newest version
+    python migrate.py status           # list migrations and when each was applied
+    python migrate.py downgrade 3      # revert everything newer than 003
+    python migrate.py stamp [VERSION]  # record migrations as applied without running them
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app import migrator
+
+
+def main(argv):
+    command = argv[0] if argv else "upgrade"
+
+    if command == "upgrade":
+        applied = migrator.upgrade()
+        if applied:
+            for migration in applied:
+                print(f"✅ {migration.version:03d}_{migration.name}")
+        else:
+            print("✅ Database is up to date")
+    elif command == "status":
+        for row in migrator.status():
+            state = row["applied_at"] or "pending"
+            print(f"{row['version']:03d}_{row['name']:<45} {state}")
+    elif command == "downgrade" and len(argv) == 2:
+        for migration in migrator.downgrade(int(argv[1])):
+            print(f"↩️  {migration.version:03d}_{migration.name}")
+    elif command == "stamp":
+        version = int(argv[1]) if len(argv) > 1 else None
+        for migration in migrator.stamp(version):
+            print(f"📌 {migration.version:03d}_{migration.name}")
+    else:
+        print(__doc__)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    try:
+        main(sys.argv[1:])
+    except Exception as e:
+        print(f"\n❌ Migration failed: {e}")
+        sys.exit(1)
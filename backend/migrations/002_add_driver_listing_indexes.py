@@ -0,0 +1,34 @@
+"""
+Migration: Add indexes for the admin driver list
+Keyset pagination on (created_at, driver_id) and prefix search on name, email and phone
+"""
+
+from app.migrator import create_index, drop_index
+
+# Indexes are built CONCURRENTLY on Postgres so drivers stays writable
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    """Create driver listing and search indexes"""
+    # text_pattern_ops lets LIKE 'term%' use the index under non-C collations
+    pattern_ops = " text_pattern_ops" if conn.dialect.name == "postgresql" else ""
+    
+    # Keyset pagination (newest first)
+    create_index(conn, "idx_drivers_created_at_id", "drivers", "created_at, driver_id")
+    
+    # Prefix search
+    create_index(conn, "idx_drivers_name_lower", "drivers", f"lower(name){pattern_ops}")
+    create_index(conn, "idx_drivers_email_lower", "drivers", f"lower(email){pattern_ops}")
+    create_index(conn, "idx_drivers_phone_pattern", "drivers", f"phone{pattern_ops}")
+    
+    print("✅ Migration completed: driver listing indexes created")
+
+
+def downgrade(conn):
+    """Drop driver listing and search indexes"""
+    drop_index(conn, "idx_drivers_phone_pattern")
+    drop_index(conn, "idx_drivers_email_lower")
+    drop_index(conn, "idx_drivers_name_lower")
+    drop_index(conn, "idx_drivers_created_at_id")
+    print("✅ Migration rolled back: driver listing indexes dropped")
@@ -0,0 +1,27 @@
+"""
+Migration: Add composite indexes for audit log paging
+Keyset pagination on (created_at, log_id), optionally filtered by action_type
+"""
+
+from app.migrator import create_index, drop_index
+
+# Indexes are built CONCURRENTLY on Postgres so audit_logs stays writable
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    """Create audit log paging indexes"""
+    # Unfiltered listing (newest first)
+    create_index(conn, "idx_audit_logs_created_at_id", "audit_logs", "created_at, log_id")
+    
+    # Listing filtered by action type
+    create_index(conn, "idx_audit_logs_action_created_at", "audit_logs", "action_type, created_at")
+    
+    print("✅ Migration completed: audit log indexes created")
+
+
+def downgrade(conn):
+    """Drop audit log paging indexes"""
+    drop_index(conn, "idx_audit_logs_action_created_at")
+    drop_index(conn, "idx_audit_logs_created_at_id")
+    print("✅ Migration rolled back: audit log indexes dropped")
@@ -0,0 +1,65 @@
+"""
+Migration: Add fleet analytics rollup tables
+Creates bus_daily_stats and rollup_watermarks, and widens
+active_bus_locations.bus_number to fit vehicle numbers
+"""
+
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    """Create analytics tables"""
+    # Location history is written now; bus numbers are vehicle numbers.
+    # Widening a VARCHAR only changes the catalog, the table isn't rewritten.
+    # SQLite doesn't enforce lengths (or support ALTER COLUMN).
+    if conn.dialect.name != "sqlite":
+        conn.execute(text("""
+            ALTER TABLE active_bus_locations
+            ALTER COLUMN bus_number TYPE VARCHAR(20);
+        """))
+    
+    # Per-bus daily rollup
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS bus_daily_stats (
+            stat_id SERIAL PRIMARY KEY,
+            stat_date DATE NOT NULL,
+            bus_number VARCHAR(20) NOT NULL,
+            route_id INTEGER,
+            fix_count INTEGER NOT NULL DEFAULT 0,
+            distance_km DOUBLE PRECISION NOT NULL DEFAULT 0,
+            moving_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+            idle_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+            max_speed_kmh DOUBLE PRECISION NOT NULL DEFAULT 0,
+            first_fix_at TIMESTAMP WITH TIME ZONE,
+            last_fix_at TIMESTAMP WITH TIME ZONE,
+            last_latitude DOUBLE PRECISION,
+            last_longitude DOUBLE PRECISION,
+            CONSTRAINT uq_bus_daily_stats_date_bus UNIQUE (stat_date, bus_number)
+        );
+    """))
+    
+    # Route reports
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_bus_daily_stats_route_date
+        ON bus_daily_stats(route_id, stat_date);
+    """))
+    
+    # Rollup progress
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            name VARCHAR(50) PRIMARY KEY,
+            watermark TIMESTAMP WITH TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE
+        );
+    """))
+    
+    print("✅ Migration completed: fleet analytics tables created")
+
+
+def downgrade(conn):
+    """Drop analytics tables"""
+    cascade = " CASCADE" if conn.dialect.name == "postgresql" else ""
+    conn.execute(text(f"DROP TABLE IF EXISTS rollup_watermarks{cascade};"))
+    conn.execute(text(f"DROP TABLE IF EXISTS bus_daily_stats{cascade};"))
+    print("✅ Migration rolled back: fleet analytics tables dropped")
+
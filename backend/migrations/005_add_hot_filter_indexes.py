@@ -0,0 +1,29 @@
+"""
+Migration: Add indexes for the hot route filters
+Active routes by sl_no (student list), sl_no order (admin list and exports),
+a driver's active route (driver profile) and routes by created_at
+"""
+
+from app.migrator import create_index, drop_index
+
+# Indexes are built CONCURRENTLY on Postgres so the tables stay writable
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    """Create bus_routes and routes indexes"""
+    create_index(conn, "idx_bus_routes_active_sl_no", "bus_routes", "is_active, sl_no")
+    create_index(conn, "idx_bus_routes_sl_no_id", "bus_routes", "sl_no, route_id")
+    create_index(conn, "idx_bus_routes_driver_active", "bus_routes", "driver_id, is_active")
+    create_index(conn, "idx_routes_created_at", "routes", "created_at")
+    
+    print("✅ Migration completed: route filter indexes created")
+
+
+def downgrade(conn):
+    """Drop bus_routes and routes indexes"""
+    drop_index(conn, "idx_routes_created_at")
+    drop_index(conn, "idx_bus_routes_driver_active")
+    drop_index(conn, "idx_bus_routes_sl_no_id")
+    drop_index(conn, "idx_bus_routes_active_sl_no")
+    print("✅ Migration rolled back: route filter indexes dropped")
@@ -0,0 +1,41 @@
+"""
+Migration: Add active_bus_locations.ingested_at
+The analytics rollup reads fixes by when they were written rather than when
+they were recorded, so fixes retried after a database outage aren't skipped.
+Existing rows are backfilled with recorded_at, which the rollup has already
+read up to its watermark.
+"""
+
+from sqlalchemy import inspect, text
+
+from app.migrator import create_index, drop_index
+
+# The index is built CONCURRENTLY on Postgres so the table stays writable
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    """Add, backfill and index ingested_at"""
+    columns = {column["name"] for column in inspect(conn).get_columns("active_bus_locations")}
+    if "ingested_at" not in columns:
+        conn.execute(text("""
+            ALTER TABLE active_bus_locations
+            ADD COLUMN ingested_at TIMESTAMP WITH TIME ZONE;
+        """))
+    conn.execute(text("""
+        UPDATE active_bus_locations
+        SET ingested_at = recorded_at
+        WHERE ingested_at IS NULL;
+    """))
+    create_index(conn, "ix_active_bus_locations_ingested_at", "active_bus_locations", "ingested_at")
+
+    print("✅ Migration completed: active_bus_locations.ingested_at added")
+
+
+def downgrade(conn):
+    """Drop ingested_at"""
+    drop_index(conn, "ix_active_bus_locations_ingested_at")
+    columns = {column["name"] for column in inspect(conn).get_columns("active_bus_locations")}
+    if "ingested_at" in columns:
+        conn.execute(text("ALTER TABLE active_bus_locations DROP COLUMN ingested_at;"))
+    print("✅ Migration rolled back: active_bus_locations.ingested_at dropped")
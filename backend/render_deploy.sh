@@ -7,13 +7,9 @@ echo "🚀 Starting Render deployment..."
 echo "📦 Installing dependencies..."
 pip install -r requirements.txt
 
-# Initialize database
+# Migrate the schema and create the admin user
 echo "🔄 Initializing database..."
 python init_db.py
 
-# Run database migrations
-echo "🔄 Running migrations..."
-python init_models.py
-
 echo "✅ Deployment complete!"
 echo "🌐 Admin credentials: +919876543210 / admin"
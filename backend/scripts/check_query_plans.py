@@ -0,0 +1,269 @@
+"""
+Query plan check for the read endpoints.
+
+Seeds a scratch database with enough rows that missing indexes show up,
+calls each router's read endpoints, and EXPLAINs every SELECT they issued.
+Exits 1 if a query with a WHERE clause reads a whole large table
+(SQLite "SCAN <table>" without an index, Postgres "Seq Scan"). Queries
+without a WHERE clause read the whole table on purpose and are not checked.
+
+Usage:
+    python scripts/check_query_plans.py                  # temporary SQLite file
+    python scripts/check_query_plans.py postgresql://... # empty scratch database
+"""
+
+import os
+import re
+import sys
+import tempfile
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+# Rows per seeded table. Tables seeded here are the "large" ones.
+SEED_ROWS = {
+    "drivers": 2000,
+    "bus_routes": 2000,
+    "audit_logs": 20000,
+    "buses": 1000,
+    "routes": 1000,
+    "active_bus_locations": 20000,
+    "bus_daily_stats": 5000,
+}
+
+# Full scans that are expected: (dialect, table, endpoint) -> reason
+ALLOWED_SCANS = {
+    ("*", "routes", "/api/v1/routes/search/by-name?q=Route%201"):
+        "substring match (ILIKE '%q%'); a btree index can't serve it",
+    ("sqlite", "drivers", "/api/admin/drivers?search=kum"):
+        "SQLite skips indexes for LIKE ... ESCAPE; Postgres uses text_pattern_ops",
+    ("sqlite", "drivers", "/api/admin/drivers?search=%2B91900"):
+        "SQLite skips indexes for LIKE ... ESCAPE; Postgres uses text_pattern_ops",
+}
+
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+HAS_WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+
+def _configure(database_url: str):
+    # Must happen before the app is imported: settings are read at import time
+    os.environ["DATABASE_URL"] = database_url
+    # One sync engine, so every statement can be EXPLAINed with its parameters
+    os.environ["ASYNC_DATABASE"] = "false"
+    os.environ["LOCATION_HISTORY_ENABLED"] = "false"
+
+
+def seed(engine):
+    """Bulk-insert SEED_ROWS rows per table with realistic value spreads."""
+    from sqlalchemy import insert
+    from app.models.analytics import BusDailyStats
+    from app.models.audit_log import AuditLog
+    from app.models.bus import Bus, BusStatus
+    from app.models.bus_route import BusRoute
+    from app.models.driver import Driver
+    from app.models.location import ActiveBusLocation
+    from app.models.route import Route
+    from app.services.auth_service import hash_password
+
+    now = datetime.utcnow()
+    password = hash_password("password", rounds=4)
+    with engine.begin() as conn:
+        conn.execute(insert(Driver), [
+            {
+                "driver_id": i,
+                "name": f"Driver {i:05d} Kumar" if i % 7 else f"Driver {i:05d}",
+                "phone": f"+9190{i:08d}",
+                "email": f"driver{i}@sathyabama.edu",
+                "hashed_password": password,
+                "is_active": i % 10 != 0,
+                "is_admin": i == 1,
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(1, SEED_ROWS["drivers"] + 1)
+        ])
+        conn.execute(insert(BusRoute), [
+            {
+                "route_id": i,
+                "sl_no": i,
+                "bus_route": f"Stop {i} - Stop {i + 1} - Sathyabama",
+                "route_no": f"R{i}",
+                "vehicle_no": f"TN01AB{i:04d}",
+                "driver_id": i + 1,
+                "driver_name": f"Driver {i + 1:05d}",
+                "phone_number": f"90{i + 1:08d}",
+                "is_active": i % 5 != 0,
+            }
+            for i in range(1, SEED_ROWS["bus_routes"] + 1)
+        ])
+        actions = ["CREATE", "UPDATE", "DELETE", "IMPORT"]
+        conn.execute(insert(AuditLog), [
+            {
+                "admin_id": 1,
+                "action_type": actions[i % len(actions)],
+                "entity_type": "route" if i % 2 else "driver",
+                "entity_id": i % 1000 + 1,
+                "changes": {"field": i},
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(SEED_ROWS["audit_logs"])
+        ])
+        conn.execute(insert(Bus), [
+            {"bus_number": f"B{i:04d}", "capacity": 50, "status": BusStatus.ACTIVE}
+            for i in range(1, SEED_ROWS["buses"] + 1)
+        ])
+        conn.execute(insert(Route), [
+            {
+                "route_name": f"Route {i}",
+                "created_by_bus": f"B{i % SEED_ROWS['buses'] + 1:04d}",
+                "coordinates": [{"lat": 12.87, "lng": 80.22, "seq": 0}],
+                "created_at": now - timedelta(hours=i),
+            }
+            for i in range(SEED_ROWS["routes"])
+        ])
+        conn.execute(insert(ActiveBusLocation), [
+            {
+                "bus_number": f"TN01AB{i % 200 + 1:04d}",
+                "route_id": i % 200 + 1,
+                "latitude": 12.87 + (i % 100) / 1000,
+                "longitude": 80.22 + (i % 100) / 1000,
+                "speed": float(i % 60),
+                "recorded_at": now - timedelta(seconds=i * 5),
+            }
+            for i in range(SEED_ROWS["active_bus_locations"])
+        ])
+        conn.execute(insert(BusDailyStats), [
+            {
+                "stat_date": date.today() - timedelta(days=i // 200),
+                "bus_number": f"TN01AB{i % 200 + 1:04d}",
+                "route_id": i % 200 + 1,
+                "fix_count": 100,
+                "distance_km": 40.0,
+                "moving_seconds": 3600.0,
+                "idle_seconds": 600.0,
+                "max_speed_kmh": 55.0,
+            }
+            for i in range(SEED_ROWS["bus_daily_stats"])
+        ])
+
+
+def endpoint_requests(client, admin_headers, driver_headers):
+    """(path, headers) for every read endpoint. Paging cursors are fetched live."""
+    yield "/api/v1/student/routes/all", None
+    yield "/api/v1/driver/profile", driver_headers
+    yield "/api/v1/routes", None
+    yield "/api/v1/routes/5", None
+    yield "/api/v1/routes/search/by-name?q=Route%201", None
+    yield "/api/v1/buses", None
+    yield "/api/v1/buses/list", None
+    yield "/api/v1/auth/drivers", None
+
+    yield "/api/admin/system/status", admin_headers
+    yield "/api/admin/statistics", admin_headers
+    yield "/api/admin/drivers/options", admin_headers
+    yield "/api/admin/drivers/7", admin_headers
+    yield "/api/admin/drivers?search=kum", admin_headers
+    yield "/api/admin/drivers?search=%2B91900", admin_headers
+    first = client.get("/api/admin/drivers", headers=admin_headers).json()
+    yield "/api/admin/drivers?" + urlencode({"cursor": first["next_cursor"]}), admin_headers
+    yield "/api/admin/routes", admin_headers
+    yield "/api/admin/routes/export?format=csv", admin_headers
+    first = client.get("/api/admin/audit-log", headers=admin_headers).json()
+    yield "/api/admin/audit-log?" + urlencode({"cursor": first["next_cursor"]}), admin_headers
+    yield "/api/admin/audit-log?action_type=UPDATE", admin_headers
+    since = (datetime.utcnow() - timedelta(hours=2)).isoformat()
+    yield "/api/admin/audit-log?" + urlencode({"start_date": since}), admin_headers
+    yield "/api/admin/audit-log/export?action_type=DELETE", admin_headers
+
+    yield "/api/admin/analytics/summary", admin_headers
+    yield "/api/admin/analytics/buses?bus_number=TN01AB0007", admin_headers
+    yield "/api/admin/analytics/buses?route_id=7", admin_headers
+    yield "/api/admin/analytics/routes", admin_headers
+
+
+def full_scans(conn, statement, parameters):
+    """Tables the statement reads in full, from its EXPLAIN output."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return {m.group(1) for m in (SQLITE_SCAN.match(row[3]) for row in rows) if m}
+
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    tables = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            tables.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return tables
+
+
+def main(database_url: str) -> int:
+    _configure(database_url)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, inspect, text
+    from app import migrator
+    from app.database import engine
+    from app.main import app
+    from app.services.auth_service import create_access_token
+
+    with engine.connect() as conn:
+        if "drivers" in inspect(conn).get_table_names():
+            print("❌ Refusing to seed a database that already has tables")
+            return 2
+
+    print("📊 Creating schema and seeding...")
+    migrator.upgrade()
+    seed(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+    # Statements per endpoint, in first-seen order
+    captured = OrderedDict()
+    current = {"label": None}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.setdefault((current["label"], statement), parameters)
+
+    admin_headers = {"Authorization": "Bearer " + create_access_token({"driver_id": 1, "is_admin": True})}
+    driver_headers = {"Authorization": "Bearer " + create_access_token({"driver_id": 8, "is_admin": False})}
+
+    client = TestClient(app)
+    for label, headers in endpoint_requests(client, admin_headers, driver_headers):
+        current["label"] = label
+        response = client.get(label, headers=headers)
+        if response.status_code != 200:
+            print(f"⚠️  {label}: HTTP {response.status_code}")
+    event.remove(engine, "before_cursor_execute", capture)
+
+    failures = 0
+    with engine.connect() as conn:
+        dialect = conn.dialect.name
+        for (label, statement), parameters in captured.items():
+            if not HAS_WHERE.search(statement):
+                continue
+            for table in full_scans(conn, statement, parameters) & set(SEED_ROWS):
+                reason = ALLOWED_SCANS.get((dialect, table, label)) or ALLOWED_SCANS.get(("*", table, label))
+                if reason:
+                    print(f"ℹ️  {label}: full scan of {table} ({reason})")
+                    continue
+                failures += 1
+                print(f"❌ {label}: full scan of {table}")
+                print("   " + " ".join(statement.split()))
+
+    print(f"\n{len(captured)} statements checked, {failures} unexpected full scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    # Run from backend/ so the app package is importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.exit(main(f"sqlite:///{os.path.join(tmp, 'query_plans.db')}"))
@@ -92,6 +92,7 @@ class _DriverTrackingScreenState extends State<DriverTrackingScreen> {
             position.latitude,
             position.longitude,
             position.speed,
+            fixTime: position.timestamp,
           );
           print('✅ Location sent successfully');
         } catch (e) {
@@ -86,7 +86,7 @@ class ApiService {
     }
   }
 
-  Future<void> updateLocation(double lat, double lng, double speed) async {
+  Future<void> updateLocation(double lat, double lng, double speed, {DateTime? fixTime}) async {
     if (_currentBusNumber == null) {
       if (AppConfig.enableLogging) {
         print('Cannot update location: No active bus number');
@@ -104,6 +104,7 @@ class ApiService {
           'speed': speed,
           'heading': 0.0,
           'accuracy': 10.0,
+          if (fixTime != null) 'fix_time': fixTime.toUtc().toIso8601String(),
         },
       );
     } on DioException catch (e) {